@@ -39,8 +39,13 @@ USERBOT_PN_LIST = env.list('USERBOT_PN_LIST', default=[])
 USERBOT_HOST_LIST = env.list('USERBOT_HOST_LIST', default=[])
 
 HOST_FUNC_COUNT = 2
+HOST_FUNC_COMBINED = 0  # func 1 and func 2 on one connection, using the func 1 session
 MAX_SLEEP_TIME = 600
 
+PUSH_MODE = env.bool('PUSH_MODE', default=False)  # detect from channel updates, polling only reconciles
+PUSH_RECONCILE_FACTOR = 10  # polling intervals are multiplied by this in push mode
+PUSH_FLUSH_INTERVAL = 5
+
 
 # Application definition
 
@@ -176,6 +181,10 @@ ADMIN_REORDER = [
                 'label': _('a_excesses'),
                 'model': 'bot.Excess'
             },
+            {
+                'label': _('a_dailycounters'),
+                'model': 'bot.DailyCounter'
+            },
         ]
     },
     {
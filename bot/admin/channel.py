@@ -13,8 +13,9 @@ class ChannelAdmin(admin.ModelAdmin):
 
     fieldsets = [
         (_('parameters'), {'fields': ['channel_id', 'owner', 'history_days_limit', 'delete_albums', 'republish_today_posts',
-                                      'deletions_count_for_username_change', 'delete_posts_after_days']}),
+                                      'deletions_count_for_username_change', 'delete_posts_after_days', 'purged_up_to_id']}),
     ]
+    readonly_fields = ['purged_up_to_id']
 
     def username_custom(self, obj):
         if obj.username:
@@ -6,9 +6,10 @@ class SettingsAdmin(SingletonModelAdmin):
     fieldsets = [
         (_('parameters'), {'fields': ['chatlist_invite', 'userbots_chat_invite', 'archive_channel', 'username_suffix_length',
                                       'check_post_views_interval', 'check_post_deletions_interval',
-                                      'check_stats_interval', 'delete_old_posts_interval',
-                                      'username_change_cooldown', 'individual_allocations']}),
+                                      'check_stats_interval', 'check_stats_concurrency', 'delete_old_posts_interval',
+                                      'username_change_cooldown', 'individual_allocations', 'chatlist_version']}),
     ]
+    readonly_fields = ['chatlist_version']
 
     def has_add_permission(self, *args, **kwargs):
         return False
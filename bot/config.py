@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+import psycopg
+from django.conf import settings as django_settings
+from bot import models
+
+NOTIFY_CHANNEL = 'bot_config'
+FALLBACK_TTL = 300  # reload even without notifications, in case one was missed
+LISTEN_RETRY_TIME = 10
+
+
+# per-process cache of Settings, Channel and Limitation rows, reloaded on NOTIFY bot_config
+class ConfigCache:
+    def __init__(self):
+        self.settings: models.Settings | None = None
+        self.channels: dict[int, models.Channel] = {}
+        self.limitations: dict[int, list[models.Limitation]] = {}  # {channel_id: [limitation, ...]} newest first
+        self.version = 0
+        self.loaded_at = 0.0
+        self.stale = True
+        self.lock = asyncio.Lock()
+        self.listener: asyncio.Task | None = None
+
+    def invalidate(self):
+        self.stale = True
+
+    async def load(self):
+        settings = await models.Settings.objects.aget()
+        channels = {x.channel_id: x async for x in models.Channel.objects.order_by('channel_id')}
+        limitations = {}
+        async for limitation in models.Limitation.objects.order_by('-created'):
+            limitations.setdefault(limitation.channel_id, []).append(limitation)
+        self.settings, self.channels, self.limitations = settings, channels, limitations
+        self.version += 1
+        self.loaded_at = time.monotonic()
+        logging.info(f'Loaded config version {self.version}: {len(channels)} channels, '
+                     f'{sum(map(len, limitations.values()))} limitations')
+
+    async def refresh(self):
+        if not self.stale and time.monotonic() - self.loaded_at < FALLBACK_TTL:
+            return
+        async with self.lock:
+            if self.stale or time.monotonic() - self.loaded_at >= FALLBACK_TTL:
+                # clear the flag first so that a notification received during loading is not lost
+                self.stale = False
+                try:
+                    await self.load()
+                except Exception:
+                    self.stale = True
+                    raise
+
+    async def start(self):
+        await self.refresh()
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        database = django_settings.DATABASES['default']
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    dbname=database['NAME'],
+                    user=database['USER'],
+                    password=database['PASSWORD'],
+                    host=database['HOST'],
+                    port=database['PORT'],
+                    autocommit=True,
+                ) as conn:
+                    await conn.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    self.invalidate()  # changes could be missed while not listening
+                    async for notify in conn.notifies():
+                        logging.info(f'Config changed: {notify.payload}')
+                        self.invalidate()
+            except (psycopg.Error, OSError) as e:
+                logging.error(f'Config listener: {e}')
+                await asyncio.sleep(LISTEN_RETRY_TIME)
+
+    async def get_settings(self) -> models.Settings:
+        await self.refresh()
+        return self.settings
+
+    async def get_channels(self) -> list[models.Channel]:
+        await self.refresh()
+        return list(self.channels.values())
+
+    async def get_channel(self, channel_id: int) -> models.Channel:
+        await self.refresh()
+        if channel_id not in self.channels:
+            raise models.Channel.DoesNotExist(f'Channel {channel_id} does not exist')
+        return self.channels[channel_id]
+
+    async def get_limitations(self, channel: models.Channel, limitation_type: str) -> list[models.Limitation]:
+        await self.refresh()
+        return [x for x in self.limitations.get(channel.channel_id, []) if x.type == limitation_type]
+
+
+config = ConfigCache()
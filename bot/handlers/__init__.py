@@ -1,2 +1,2 @@
 from .app import App
-from .main import main
+from .main import main, main_group
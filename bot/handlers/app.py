@@ -1,41 +1,81 @@
 import logging
 import json
-from io import BytesIO
+import time
+from tempfile import TemporaryDirectory
 from contextlib import suppress
+from contextvars import copy_context
 from datetime import datetime, timedelta, timezone
-from asyncio import sleep
+from asyncio import sleep, create_task, Queue, Semaphore, Task
 
-from django.db.models import Q
 from channels.db import database_sync_to_async
+from django.db.models import F
 
-from telethon import TelegramClient, types, events
+from telethon import types, events
+from telethon.utils import maybe_async
 from telethon.types import InputPeerChannel, MessageMediaPhoto
 from telethon.tl.custom import Message
-from telethon.tl.types import DialogFilterChatlist, InputChatlistDialogFilter, ChatInviteAlready, AccountDaysTTL
+from telethon.tl.types import DialogFilterChatlist, InputChatlistDialogFilter, ChatInviteAlready, AccountDaysTTL, \
+    ChannelParticipantsAdmins, ChannelParticipantCreator
 from telethon.tl.types.messages import DialogFilters
-from telethon.tl.types.chatlists import ChatlistInvite
+from telethon.tl.types.chatlists import ChatlistInvite, ChatlistInviteAlready
 from telethon.tl.functions.account import UpdateStatusRequest, SetAccountTTLRequest
 from telethon.tl.functions.messages import GetDialogFiltersRequest, ImportChatInviteRequest, CheckChatInviteRequest, GetFullChatRequest
-from telethon.tl.functions.channels import EditAdminRequest, UpdateUsernameRequest
+from telethon.tl.functions.channels import EditAdminRequest, UpdateUsernameRequest, CheckUsernameRequest
 from telethon.tl.functions.chatlists import JoinChatlistInviteRequest, CheckChatlistInviteRequest, LeaveChatlistRequest
-from telethon.errors import ChatAdminRequiredError, MessageNotModifiedError, FloodWaitError, UsernameOccupiedError
+from telethon.errors import ChatAdminRequiredError, MessageNotModifiedError, FloodWaitError, UsernameOccupiedError, \
+    UnauthorizedError
 
-from app.settings import SESSIONS_DIR, API_ID, API_HASH, USERBOT_PN_LIST, USERBOT_HOST_LIST, MAX_SLEEP_TIME
+from app.settings import SESSIONS_DIR, API_ID, API_HASH, USERBOT_PN_LIST, USERBOT_HOST_LIST, HOST_FUNC_COMBINED, \
+    PUSH_MODE, PUSH_RECONCILE_FACTOR, PUSH_FLUSH_INTERVAL
 from bot import models, utils
+from bot.config import config
 from bot.types import Log, Limitation, UsernameChangeReason
-from bot.utils_lib.stats import get_stats_with_graphs
+from bot.utils_lib.stats import StatsClient
+from bot.utils_lib.lang_stats import LanguageGraph
+from bot.utils_lib.scanner import ChannelCursor, Post, refresh_views, ALBUM_MAX_SIZE
+from bot.utils_lib.limits import LimitationIndex
+from bot.utils_lib.client import UserbotClient
+from bot.utils_lib.ratelimit import priority_var
+from bot.utils_lib.supervisor import Supervisor
+
+CHANNEL_INFO_TTL = 60 * 60
+USERNAME_POOL_SIZE = 3
+ADMIN_RIGHTS = {'delete_messages': True, 'post_messages': True, 'edit_messages': True, 'change_info': True}
 
 
 class App:
     def __init__(self, phone_number: str, host: bool, func: int = 0):
-        self.session = (f'{phone_number}-host-{int(host)}-func-{func}' if host else phone_number) + '.session'
+        self.combined = host and func == HOST_FUNC_COMBINED
+        session_func = 1 if self.combined else func
+        self.session = (f'{phone_number}-host-{int(host)}-func-{session_func}' if host else phone_number) + '.session'
         self.n = USERBOT_HOST_LIST.index(phone_number) if host else USERBOT_PN_LIST.index(phone_number)
-        self.client = TelegramClient(SESSIONS_DIR / self.session, API_ID, API_HASH, receive_updates=func == 1)
+        self.client = UserbotClient(SESSIONS_DIR / self.session, API_ID, API_HASH, receive_updates=session_func == 1 or PUSH_MODE)
+        self.supervisor = Supervisor(self.client)
+        self.stats_client = StatsClient(self.client)
         self.phone_number = phone_number
         self.host = host
         self.userbot: models.UserBot | None = None
         self.channels: list[models.Channel] = []
         self.last_channels_update = datetime.min
+        self.channels_version = 0
+        self.cursors: dict[int, ChannelCursor] = {}
+        self.pushed_posts: dict[int, set[int]] = {}  # {channel_id: {post_id, ...}} views changed since the last flush
+        self.pushed_deletions: set[int] = set()  # channel ids with deletions since the last flush
+        self.channels_refreshed: dict[int, float] = {}  # {channel_id: monotonic time of the last metadata refresh}
+        self.chatlist_version = 0  # chatlist version of the settings this account has acted on
+        self.joined_channels: set[int] = set()
+        self.joined_userbots_chat: str | None = None
+        self.last_join_check = datetime.min
+        self.username_pools: dict[int, list[tuple[str, float]]] = {}  # {channel_id: [(username, monotonic time checked), ...]}
+        self.username_pool_refills: dict[int, Task] = {}
+        self.admins_state: tuple[frozenset[int], frozenset[int]] | None = None  # (channel ids, userbot ids) reconciled last
+        self.last_admins_update = datetime.min
+        self.removal_queues: dict[int, Queue] = {}
+        self.removal_workers: dict[int, Task] = {}
+        self.pending_removals: dict[int, set[int]] = {}  # {channel_id: {post_id, ...}} queued for removal
+        self.username_changes: Queue = Queue()
+        self.username_changes_pending: set[int] = set()
+        self.username_changes_worker: Task | None = None
         self.func = func
 
         self.username = None
@@ -62,73 +102,167 @@ class App:
     async def start(self):
         await self.run_until_disconnected()
 
+    async def stop(self):
+        # detached tasks would keep running against the disconnected client after a restart
+        tasks = [*self.removal_workers.values(), *self.username_pool_refills.values(), self.username_changes_worker]
+        for task in tasks:
+            if task:
+                task.cancel()
+        await self.client.disconnect()
+
     async def run_until_disconnected(self):
+        timings: dict[str, float] = {}
+        started = time.monotonic()
+
+        def phase(name: str):
+            nonlocal started
+            now = time.monotonic()
+            timings[name] = now - started
+            started = now
+
         # noinspection PyUnresolvedReferences
         await self.client.start(lambda: self.phone_number)
         await self.init_client_info()
-        await self.client.get_dialogs()
+        phase('connect')
 
         # first database access should be under sync_to_async to close old connections
-        settings = await database_sync_to_async(models.Settings.objects.get)()
+        await database_sync_to_async(models.Settings.objects.get)()
+        await config.start()
+        settings = await config.get_settings()
+        phase('config')
 
-        if not self.host or self.func == 1:
+        if not self.host or self.func == 1 or self.combined:
             await self.setup_account()
             await self.refresh_me()
-        if self.func == 1:
+            phase('account')
+        if self.func == 1 or self.combined:
             self.client.add_event_handler(
                 self.bot_action_handler,
                 events.NewMessage(incoming=True, pattern=r'^ACTION (?P<data>.+)$')
             )
+        if self.host and (self.combined or self.func == 2 and PUSH_MODE):
+            # only the job client refreshes channels, and it receives updates only in combined or push mode,
+            # otherwise metadata is refreshed by CHANNEL_INFO_TTL alone
+            self.client.add_event_handler(self.channel_update_handler, events.Raw(types.UpdateChannel))
         self.userbot = await models.UserBot.objects.aget(phone_number=self.phone_number)
+        await self.resolve_entities()
+        phase('entities')
+        logging.info(f'Started in {sum(timings.values()):.2f}s: {", ".join(f"{k} {v:.2f}s" for k, v in timings.items())}')
+        if PUSH_MODE and not (self.host and self.func == 1):
+            self.add_push_handlers()
+        reconcile = PUSH_RECONCILE_FACTOR if PUSH_MODE else 1
+        push_jobs = [('flush_pushed_updates', PUSH_FLUSH_INTERVAL)] if PUSH_MODE else []
 
         if self.host:
             if self.func == 1:
-                # noinspection PyUnresolvedReferences
-                await self.client.run_until_disconnected()
-            elif self.func == 2:
+                # the action client answers update_username requests, so it keeps its own username pools filled
+                jobs = create_task(self.start_jobs(('refill_username_pools', 60 * 5)))
+                try:
+                    # noinspection PyUnresolvedReferences
+                    await self.client.run_until_disconnected()
+                finally:
+                    jobs.cancel()
+            elif self.func == 2 or self.combined:
+                # in combined mode action events are handled alongside the jobs and take priority over their requests
                 await self.start_jobs(
                     ('switch_offline', 60),
                     ('join_channels', 60 * 5),
+                    ('refresh_chatlist_state', 60 * 5),
                     ('refresh_admins', 60 * 5),
-                    ('check_post_deletions', settings.check_post_deletions_interval),
+                    ('refill_username_pools', 60 * 5),
+                    ('check_post_deletions', settings.check_post_deletions_interval * reconcile),
                     ('check_lang_stats', settings.check_stats_interval),
-                    ('delete_old_posts', settings.delete_old_posts_interval * 60)
+                    ('delete_old_posts', settings.delete_old_posts_interval * 60),
+                    *push_jobs
                 )
         else:
             await self.start_jobs(
                 ('switch_offline', 60),
                 ('join_channels', 60 * 5),
-                ('check_post_views', settings.check_post_views_interval)
+                ('check_post_views', settings.check_post_views_interval * reconcile),
+                *push_jobs
             )
 
+    async def resolve_entities(self):
+        # access hashes persisted in the session are enough, dialogs are only downloaded on a miss
+        settings = await config.get_settings()
+        channels = await self.get_owned_channels() if self.host else await self.get_channels()
+        peers = [channel.v2_id for channel in channels]
+        if settings.archive_channel and (not self.host or self.func == 1 or self.combined):
+            peers.append(settings.archive_channel)
+        missing = 0
+        for peer in peers:
+            try:
+                await maybe_async(self.client.session.get_input_entity(peer))
+            except ValueError:
+                missing += 1
+        logging.info(f'Resolved {len(peers) - missing} of {len(peers)} peers from the session')
+        if missing:
+            await self.client.load_dialogs()
+
     async def start_jobs(self, *jobs: tuple[str, int]):
-        await utils.gather_coroutines([self.loop_wrapper(getattr(self, job), interval) for job, interval in jobs])
+        await self.supervisor.run([(job, self.job_wrapper(getattr(self, job)), interval) for job, interval in jobs])
 
-    async def loop_wrapper(self, func, sleep_time, *args, **kwargs):
+    def job_wrapper(self, func, *args, **kwargs):
         async def wrapper():
             await models.UserBot.objects.filter(user_id=self.user_id).aupdate(ping_time=datetime.now(timezone.utc))
             await func(*args, **kwargs)
-        await utils.loop_wrapper(wrapper, sleep_time)
+        return wrapper
 
     async def refresh_admins(self):
-        settings = await models.Settings.objects.aget()
-        chat_invite_info: ChatInviteAlready = await self.client(CheckChatInviteRequest(settings.userbots_chat_invite))
-        await self.client(GetFullChatRequest(chat_invite_info.chat.id))
+        channels = await self.get_owned_channels()
+        user_ids = [x async for x in models.UserBot.objects.exclude(phone_number__in=USERBOT_HOST_LIST).values_list('user_id', flat=True)]
+        state = (frozenset(x.channel_id for x in channels), frozenset(user_ids))
+        if state == self.admins_state and datetime.now() - self.last_admins_update < timedelta(hours=1):
+            return
 
-        async for channel in models.Channel.objects.filter(owner=self.userbot):
-            async for user in models.UserBot.objects.exclude(phone_number__in=USERBOT_HOST_LIST):
-                privileges = types.TypeChatAdminRights(delete_messages=True, post_messages=True, edit_messages=True, change_info=True)
+        resolved = False
+        for channel in channels:
+            admins = {}
+            async for user in self.client.iter_participants(channel.v2_id, filter=ChannelParticipantsAdmins):
+                admins[user.id] = user.participant
+            for user_id in user_ids:
+                participant = admins.get(user_id)
+                if isinstance(participant, ChannelParticipantCreator):
+                    continue
+                rights = getattr(participant, 'admin_rights', None)
+                if rights and all(getattr(rights, x) for x in ADMIN_RIGHTS):
+                    continue
+                if not resolved:
+                    # userbots are known to the client only through the common chat
+                    settings = await config.get_settings()
+                    chat_invite_info: ChatInviteAlready = await self.client(CheckChatInviteRequest(settings.userbots_chat_invite))
+                    await self.client(GetFullChatRequest(chat_invite_info.chat.id))
+                    resolved = True
+                privileges = types.TypeChatAdminRights(**ADMIN_RIGHTS)
                 # noinspection PyTypeChecker
-                await self.client(EditAdminRequest(channel.v2_id, user.user_id, privileges, ''))
-                logging.info(f'Promoted {user.user_id} to admin in {channel.title}')
-                await sleep(1)
+                await self.client(EditAdminRequest(channel.v2_id, user_id, privileges, ''))
+                logging.info(f'Promoted {user_id} to admin in {channel.title}')
+        self.admins_state = state
+        self.last_admins_update = datetime.now()
 
     async def refresh_channel(self, channel: models.Channel):
+        refreshed = self.channels_refreshed.get(channel.channel_id)
+        if refreshed is not None and time.monotonic() - refreshed < CHANNEL_INFO_TTL:
+            return
         channel_api: types.Channel = await self.client.get_entity(channel.v2_id)
-        channel.title = channel_api.title
-        channel.username = channel_api.username
-        channel.has_protected_content = channel_api.noforwards
-        await channel.asave()
+        self.channels_refreshed[channel.channel_id] = time.monotonic()
+        info = {
+            'title': channel_api.title,
+            'username': channel_api.username,
+            'has_protected_content': bool(channel_api.noforwards),
+        }
+        # a channel write reloads the config cache of every process, so only actual changes are saved
+        changed = [field for field, value in info.items() if getattr(channel, field) != value]
+        if changed:
+            for field in changed:
+                setattr(channel, field, info[field])
+            await channel.asave(update_fields=changed)
+            logging.info(f'Channel {channel.channel_id} changed: {", ".join(changed)}')
+
+    async def channel_update_handler(self, update: types.UpdateChannel):
+        # title, username or content protection may have changed, refresh on the next check
+        self.channels_refreshed.pop(update.channel_id, None)
 
     async def refresh_me(self):
         await models.UserBot.objects.aupdate_or_create(user_id=self.user_id, defaults={
@@ -146,37 +280,116 @@ class App:
         await sleep(1)
         await self.client(UpdateStatusRequest(offline=True))
 
+    async def refresh_chatlist_state(self):
+        # the host publishes the chatlist channels, so the userbots do not have to check the invite themselves
+        settings = await config.get_settings()
+        if not settings.chatlist_invite:
+            return
+        check: ChatlistInvite | ChatlistInviteAlready = await self.client(CheckChatlistInviteRequest(slug=settings.chatlist_invite))
+        channel_ids = sorted(chat.id for chat in check.chats)
+        if channel_ids != settings.chatlist_channels:
+            await models.Settings.objects.filter(pk=settings.pk).aupdate(
+                chatlist_channels=channel_ids, chatlist_version=F('chatlist_version') + 1
+            )
+            config.invalidate()
+            logging.info(f'Chatlist changed: {len(channel_ids)} channels')
+
     async def join_channels(self):
-        settings = await models.Settings.objects.aget()
-        chat_invite_info = await self.client(CheckChatInviteRequest(settings.userbots_chat_invite))
-        if not isinstance(chat_invite_info, ChatInviteAlready):
-            await self.client(ImportChatInviteRequest(settings.userbots_chat_invite))
-        check: ChatlistInvite = await self.client(CheckChatlistInviteRequest(slug=settings.chatlist_invite))
+        settings = await config.get_settings()
+        recheck = datetime.now() - self.last_join_check > timedelta(hours=1)
+        if recheck or self.joined_userbots_chat != settings.userbots_chat_invite:
+            chat_invite_info = await self.client(CheckChatInviteRequest(settings.userbots_chat_invite))
+            if not isinstance(chat_invite_info, ChatInviteAlready):
+                await self.client(ImportChatInviteRequest(settings.userbots_chat_invite))
+            self.joined_userbots_chat = settings.userbots_chat_invite
+
+        # act only when the published chatlist has channels this account has not joined yet,
+        # or when the host has not published it (version 0)
+        missing = set(settings.chatlist_channels) - self.joined_channels
+        if not (recheck or settings.chatlist_version == 0 or
+                settings.chatlist_version != self.chatlist_version and missing):
+            self.chatlist_version = settings.chatlist_version
+            return
+        check: ChatlistInvite | ChatlistInviteAlready = await self.client(CheckChatlistInviteRequest(slug=settings.chatlist_invite))
         channels = [channel for channel in check.chats if channel.left]
         if channels:
-            # delete old chatlists
-            filters: DialogFilters = await self.client(GetDialogFiltersRequest())
-            for fil in filters.filters:
-                if isinstance(fil, DialogFilterChatlist):
-                    await self.client(LeaveChatlistRequest(InputChatlistDialogFilter(fil.id), []))
-            # join new chatlist
+            if isinstance(check, ChatlistInvite):
+                # the invite changed: old chatlists are removed as folders only, their channels are kept
+                filters: DialogFilters = await self.client(GetDialogFiltersRequest())
+                for fil in filters.filters:
+                    if isinstance(fil, DialogFilterChatlist):
+                        await self.client(LeaveChatlistRequest(InputChatlistDialogFilter(fil.id), []))
+            # join only the missing channels
             await self.client(JoinChatlistInviteRequest(
                 slug=settings.chatlist_invite,
                 peers=[InputPeerChannel(x.id, x.access_hash) for x in channels],
             ))
-            await self.client.get_dialogs()
+            # the joined channels come with the result, so they are already saved to the session
             logging.info(f'Joined {len(channels)} channels: {", ".join([channel.title for channel in channels])}')
+        self.joined_channels = {chat.id for chat in check.chats}
+        self.chatlist_version = settings.chatlist_version
+        if recheck:
+            self.last_join_check = datetime.now()
+
+    def take_pooled_username(self, channel: models.Channel, suffix_length: int, cooldown: int):
+        # candidates older than the username change cooldown could have been taken meanwhile
+        pool = self.username_pools.get(channel.channel_id, [])
+        if not channel.username:
+            return None
+        base = channel.username[:-suffix_length]
+        while pool:
+            username, checked = pool.pop(0)
+            if (time.monotonic() - checked < cooldown * 60 and username != channel.username
+                    and len(username) == len(channel.username) and username.startswith(base)):
+                return username
+        return None
+
+    def schedule_username_pool_refill(self, channel: models.Channel):
+        task = self.username_pool_refills.get(channel.channel_id)
+        if task is None or task.done():
+            # the refill is background work, it must not inherit the priority of the action that scheduled it
+            context = copy_context()
+            context.run(priority_var.set, False)
+            self.username_pool_refills[channel.channel_id] = create_task(self.refill_username_pool(channel), context=context)
+
+    async def refill_username_pool(self, channel: models.Channel):
+        if not channel.username:
+            return
+        settings = await config.get_settings()
+        sl = settings.username_suffix_length or 1
+        pool = self.username_pools.setdefault(channel.channel_id, [])
+        pool[:] = [x for x in pool if time.monotonic() - x[1] < settings.username_change_cooldown * 60]
+        for _ in range(USERNAME_POOL_SIZE * 3):
+            if len(pool) >= USERNAME_POOL_SIZE:
+                break
+            candidate = utils.rand_username(channel.username, sl)
+            if any(candidate == x[0] for x in pool):
+                continue
+            try:
+                if await self.client(CheckUsernameRequest(channel.v2_id, candidate)):
+                    pool.append((candidate, time.monotonic()))
+            except Exception as e:
+                logging.warning(f'Cant check username {candidate} for {channel.title}: {e}')
+                break
+
+    async def refill_username_pools(self):
+        for channel in await self.get_owned_channels():
+            await self.refill_username_pool(channel)
 
     async def change_username(self, channel: models.Channel, reason, comment, ignore_wait=False):
-        sl = (await models.Settings.objects.aget()).username_suffix_length or 1
+        settings = await config.get_settings()
+        sl = settings.username_suffix_length or 1
         for _ in range(3):
-            new_username = utils.rand_username(channel.username, sl)
+            # a pre-checked free username makes the change a single request, a random one is the fallback
+            pooled_username = self.take_pooled_username(channel, sl, settings.username_change_cooldown)
+            new_username = pooled_username or utils.rand_username(channel.username, sl)
             logging.info(f'Updating channel {channel.title} username to {new_username}')
             try:
                 await self.client(UpdateUsernameRequest(channel.v2_id, new_username))
                 channel.username = new_username
                 channel.last_username_change = datetime.now(timezone.utc)
-                await channel.asave()
+                await channel.asave(update_fields=['username', 'last_username_change'])
+                await utils.increment_daily_counter(channel, 'username_changes')
                 await models.Log.objects.acreate(
                     type=Log.USERNAME_CHANGE,
                     userbot=self.userbot,
@@ -184,12 +397,14 @@ class App:
                     reason=reason,
                     comment=comment
                 )
+                self.schedule_username_pool_refill(channel)
                 return new_username
             except UsernameOccupiedError:
                 logging.warning(f'Username {new_username} is occupied')
-                await sleep(5)
+                if not pooled_username:
+                    await sleep(5)
             except FloodWaitError as e:
-                logging.warning(f'Flood wait {e.seconds} seconds')
+                # the rate limiter keeps UpdateUsernameRequest blocked for the flood wait time
                 await models.Log.objects.acreate(
                     type=Log.USERNAME_CHANGE,
                     userbot=self.userbot,
@@ -199,8 +414,6 @@ class App:
                     comment=comment,
                     error_message=str(e)[-256:]
                 )
-                if not ignore_wait:
-                    await sleep(min(e.seconds, MAX_SLEEP_TIME))
                 return None
             except Exception as e:
                 logging.critical(e)
@@ -211,11 +424,10 @@ class App:
     async def change_username_by_limit(self, channel: models.Channel, reason: str, comment: str, events_count: int, events_limit: int):
         if not await utils.is_username_change_unlocked(channel):
             return None
-        daily_username_changes_count = await models.Log.objects.filter(
-            channel=channel, type=Log.USERNAME_CHANGE, success=True, created__gte=utils.day_start()
-        ).acount()
+        today_start, today_end = utils.day_range()
+        daily_username_changes_count = (await utils.get_daily_counter(channel)).username_changes
         excess = await models.Excess.objects.filter(
-            channel=channel, type=Log.USERNAME_CHANGE, created__gte=utils.day_start()
+            channel=channel, type=Log.USERNAME_CHANGE, created__gte=today_start, created__lt=today_end
         ).order_by('-created').afirst()
         daily_exceeded = ((excess.value if excess else 0) + daily_username_changes_count) * events_limit
         if daily_exceeded >= events_count:
@@ -233,63 +445,114 @@ class App:
                 await models.Excess.objects.acreate(channel=channel, type=Log.USERNAME_CHANGE, value=new_excess)
         return await self.change_username(channel, reason, comment)
 
+    def queue_username_change(self, channel: models.Channel, reason: str, comment: str, events_count: int, events_limit: int):
+        # username changes go through a serialized lane, so a limit hit does not hold up checks of other channels
+        if channel.channel_id in self.username_changes_pending:
+            return
+        self.username_changes_pending.add(channel.channel_id)
+        self.username_changes.put_nowait((channel, reason, comment, events_count, events_limit))
+        if self.username_changes_worker is None or self.username_changes_worker.done():
+            self.username_changes_worker = create_task(self.process_username_changes())
+
+    async def process_username_changes(self):
+        while True:
+            channel, reason, comment, events_count, events_limit = await self.username_changes.get()
+            try:
+                await self.change_username_by_limit(channel, reason, comment, events_count, events_limit)
+            except Exception as e:
+                logging.exception(f'Username change for {channel.title} failed: {e}')
+            finally:
+                self.username_changes_pending.discard(channel.channel_id)
+
+    async def get_owned_channels(self):
+        return [channel for channel in await config.get_channels() if channel.owner_id == self.userbot.user_id]
+
     async def get_channels(self, owner=False):
-        if datetime.now() - self.last_channels_update < timedelta(minutes=3):
+        settings = await config.get_settings()
+        if self.channels_version == config.version and datetime.now() - self.last_channels_update < timedelta(minutes=3):
             return self.channels
-        channels = models.Channel.objects.all()
-        if owner:
-            channels = channels.filter(owner=self.userbot)
-        if (await models.Settings.objects.aget()).individual_allocations:
-            channels_count = await channels.acount()
+        channels = await self.get_owned_channels() if owner else await config.get_channels()
+        if settings.individual_allocations:
+            channels_count = len(channels)
             userbot_count = await models.UserBot.objects.filter(phone_number__in=USERBOT_PN_LIST).acount()
             if channels_count == 0 or userbot_count == 0:
-                self.last_channels_update = datetime.now()
-                self.channels = []
-                return self.channels
-            if userbot_count <= channels_count:
+                channels = []
+            elif userbot_count <= channels_count:
                 # split channels as evenly as possible between bots
                 low = (self.n * channels_count) // userbot_count
                 high = ((self.n + 1) * channels_count) // userbot_count
+                channels = channels[low:high]
             else:
                 # more bots than channels: assign one channel per bot, cycling
                 low = self.n % channels_count
-                high = low + 1
-            channels.query.set_limits(low, high)
+                channels = channels[low:low + 1]
+        if self.channels_version == 0 or {x.channel_id for x in channels} != {x.channel_id for x in self.channels}:
+            await self.userbot.channels.aset(channels)
         self.last_channels_update = datetime.now()
-        self.channels = [x async for x in channels]
-        await self.userbot.channels.aset(channels)
+        self.channels_version = config.version
+        self.channels = channels
         return self.channels
 
     async def check_post_deletions(self):
-        now = datetime.now(timezone.utc)
-        async for channel in models.Channel.objects.filter(owner=self.userbot):
-            await self.refresh_channel(channel)
-            daily_deletions_count = await models.Log.objects.filter(
-                channel=channel, type=Log.DELETION, success=True,
-                created__year=now.year, created__month=now.month, created__day=now.day,
-            ).values('post_id').distinct().acount()
-            logging.info(f'Checking channel {channel.title} with {daily_deletions_count} daily deletions')
-            if channel.deletions_count_for_username_change:
-                comment = f'Daily deletions {daily_deletions_count} > limit {channel.deletions_count_for_username_change}'
-                await self.change_username_by_limit(channel, UsernameChangeReason.DELETIONS_LIMIT, comment,
-                                                    daily_deletions_count, channel.deletions_count_for_username_change)
+        for channel in await self.get_owned_channels():
+            await self.check_channel_deletions(channel)
+
+    async def check_channel_deletions(self, channel: models.Channel):
+        await self.refresh_channel(channel)
+        daily_deletions_count = (await utils.get_daily_counter(channel)).deletions
+        logging.info(f'Checking channel {channel.title} with {daily_deletions_count} daily deletions')
+        if channel.deletions_count_for_username_change:
+            comment = f'Daily deletions {daily_deletions_count} > limit {channel.deletions_count_for_username_change}'
+            await self.change_username_by_limit(channel, UsernameChangeReason.DELETIONS_LIMIT, comment,
+                                                daily_deletions_count, channel.deletions_count_for_username_change)
 
     async def delete_old_posts(self):
-        now = datetime.now(timezone.utc)
-        async for channel in models.Channel.objects.filter(delete_posts_after_days__gt=0):
-            logging.info(f'Checking channel {channel.title}')
-            messages = []
-            async for message in self.client.iter_messages(
-                channel.v2_id, limit=100,
-                offset_date=now - timedelta(days=channel.delete_posts_after_days)
-            ):
-                messages.append(message.id)
-            logging.info(f'Found {len(messages)} messages')
-            await self.client.delete_messages(channel.v2_id, messages)
-            await sleep(5)
+        channels = [x for x in await self.get_owned_channels() if x.delete_posts_after_days > 0]
+        # channels are purged concurrently, the pace is kept by the rate limiter of DeleteMessagesRequest
+        await utils.gather_coroutines([self.purge_channel_isolated(channel) for channel in channels])
+
+    async def purge_channel_isolated(self, channel: models.Channel):
+        # a failing channel must not abort the run and leave the other purges running on their own
+        try:
+            await self.purge_channel(channel)
+        except (UnauthorizedError, ConnectionError):
+            raise
+        except Exception as e:
+            logging.exception(f'Purging channel {channel.title} failed: {e}')
+
+    async def purge_channel(self, channel: models.Channel):
+        cutoff = datetime.now(timezone.utc) - timedelta(days=channel.delete_posts_after_days)
+        newest = await self.client.get_messages(channel.v2_id, limit=1, offset_date=cutoff)
+        if not newest:
+            return
+        high = newest[0].id
+        mark = channel.purged_up_to_id
+        low = mark + 1
+        if mark == 0:
+            oldest = await self.client.get_messages(channel.v2_id, limit=1, reverse=True)
+            low = oldest[0].id if oldest else high + 1
+        if low > high:
+            return
+        logging.info(f'Purging messages {low}-{high} from channel {channel.title}')
+        deleted = 0
+        try:
+            # message ids of a channel are sequential, so the backlog is deleted in full id ranges without reading it
+            for start in range(low, high + 1, utils.MESSAGES_CHUNK_SIZE):
+                ids = list(range(start, min(start + utils.MESSAGES_CHUNK_SIZE, high + 1)))
+                affected = await self.client.delete_messages(channel.v2_id, ids)
+                deleted += sum(x.pts_count for x in affected)
+                channel.purged_up_to_id = ids[-1]
+        finally:
+            # the mark is saved once per run, not per batch
+            if channel.purged_up_to_id != mark:
+                await channel.asave(update_fields=['purged_up_to_id'])
+            logging.info(f'Purged {deleted} messages from channel {channel.title} up to {channel.purged_up_to_id}')
 
     async def check_post_views(self):
         channels = await self.get_channels()
+        channel_ids = {channel.channel_id for channel in channels}
+        for channel_id in [x for x in self.cursors if x not in channel_ids]:
+            del self.cursors[channel_id]
         chunk, offset = 5, 0
         while offset < len(channels):
             await utils.gather_coroutines([
@@ -298,110 +561,196 @@ class App:
             ])
             offset += chunk
 
-    async def check_channel_post_views(self, channel):
-        now = datetime.now(timezone.utc)
-        logging.info(f'Checking channel {channel.channel_id}')
+    async def scan_channel_posts(self, channel: models.Channel) -> list[Post]:
+        min_date = datetime.now(timezone.utc).date() - timedelta(days=channel.history_days_limit)
+        cursor = self.cursors.get(channel.channel_id)
+        if cursor is None or not cursor.covers(min_date):
+            # first pass or extended history window: walk back through the whole window once
+            cursor = self.cursors[channel.channel_id] = ChannelCursor()
+            async for message in self.client.iter_messages(channel.v2_id):
+                message: types.Message
+                if message.date.replace(tzinfo=timezone.utc).date() < min_date:
+                    break
+                cursor.add(message)
+        else:
+            # refresh views of known posts in bulk, then fetch only the posts newer than the cursor
+            await refresh_views(self.client, channel.v2_id, cursor)
+            async for message in self.client.iter_messages(channel.v2_id, min_id=cursor.max_id):
+                cursor.add(message)
+        cursor.trim(min_date)
+        logging.info(f'Scanned {len(cursor.posts)} posts in channel {channel.channel_id}, newest id {cursor.max_id}')
+        return sorted(cursor.posts.values(), key=lambda x: x.id, reverse=True)
+
+    async def fetch_flagged_messages(self, channel: models.Channel, posts: list[Post]):
         single_messages: list[types.Message] = []
         grouped_messages: dict[int, list[types.Message]] = {}
-        limitations = [x async for x in models.Limitation.objects.filter(
-            channel=channel, type=Limitation.POST_VIEWS
-        ).order_by('-created')]
-        async for message in self.client.iter_messages(channel.v2_id):
-            message: types.Message
+        if not posts:
+            return single_messages, grouped_messages
+        # full messages are only needed for the posts that are going to be deleted or republished,
+        # album parts are known from the scan, so everything is fetched by id in one go
+        cursor = self.cursors.get(channel.channel_id) or ChannelCursor()
+        single_ids = set()
+        groups = set()
+        ids = set()
+        for post in posts:
+            if post.grouped_id and channel.delete_albums:
+                groups.add(post.grouped_id)
+                ids.update(cursor.groups.get(post.grouped_id, (post.id,)))
+            else:
+                single_ids.add(post.id)
+                ids.add(post.id)
+        for grouped_id in groups & cursor.incomplete_groups:
+            # album cut off by the scan window: look for the rest of it next to the known parts
+            known = cursor.groups[grouped_id]
+            ids.update(range(max(min(known) - ALBUM_MAX_SIZE + 1, 1), max(known) + ALBUM_MAX_SIZE))
+        async for message in self.client.iter_messages(channel.v2_id, ids=sorted(ids)):
+            if not isinstance(message, types.Message):
+                continue
             message.date = message.date.replace(tzinfo=timezone.utc)
-            if message.date.date() < now.date() - timedelta(days=channel.history_days_limit):
-                break
-            if not message.views:
+            if message.grouped_id in groups:
+                grouped_messages.setdefault(message.grouped_id, []).append(message)
+            elif message.id in single_ids:
+                single_messages.append(message)
+        return single_messages, grouped_messages
+
+    async def check_channel_post_views(self, channel):
+        logging.info(f'Checking channel {channel.channel_id}')
+        posts = await self.scan_channel_posts(channel)
+        await self.check_posts(channel, posts)
+
+    async def check_posts(self, channel: models.Channel, posts: list[Post]):
+        now = datetime.now(timezone.utc)
+        flagged_posts: dict[int, Post] = {}
+        index = LimitationIndex(await config.get_limitations(channel, Limitation.POST_VIEWS))
+        post_checks: dict[int, models.PostCheck] = {x.post_id: x async for x in models.PostCheck.objects.filter(
+            channel=channel, post_id__gte=min(post.id for post in posts)
+        )} if posts else {}
+        new_post_checks: list[models.PostCheck] = []
+        changed_post_checks: list[models.PostCheck] = []
+        for message in posts:
+            rules = index.lookup(message.date.date())
+            if rules is None:
                 continue
             logging.info(f'Found views {message.views}')
-            for limitation in limitations:
-                logging.info(f'Checking limitation {limitation.start} - {limitation.end}, post date {message.date.date()}')
-                if limitation.start <= message.date.date() <= limitation.end:
-                    skip = False
-                    for lim in limitations:
-                        if (
-                            lim.start <= message.date.date() <= lim.end and lim.priority < limitation.priority and
-                            bool(lim.views) == bool(limitation.views) and
-                            bool(lim.views_difference) == bool(limitation.views_difference)
-                        ):
-                            logging.info(f'Skipping limitation {limitation.start} - {limitation.end} with priority {limitation.priority} '
-                                         f'because it is inside {lim.start} - {lim.end} with priority {lim.priority}')
-                            skip = True
+            if rules.views and message.views > rules.views:
+                logging.info(f'Found views {message.views} more than limitation {rules.views}')
+                flagged_posts[message.id] = message
+            if rules.views_difference:
+                logging.info(f'Checking views difference {rules.views_difference}')
+                if post := post_checks.get(message.id):
+                    for views_difference, interval in rules.views_difference:
+                        if post.last_check < now - timedelta(minutes=interval) \
+                                and (message.views - post.views) * 100 / post.views > views_difference:
+                            logging.info(f'Found views difference {views_difference}')
+                            flagged_posts[message.id] = message
+                            post.last_check = now
+                            changed_post_checks.append(post)
                             break
-                    if skip:
-                        continue
-                    if limitation.views and message.views > limitation.views:
-                        logging.info(f'Found views {message.views} more than limitation {limitation.views}')
-                        if message.grouped_id and channel.delete_albums:
-                            if message.grouped_id not in grouped_messages:
-                                grouped_messages[message.grouped_id] = await utils.collect_media_group(self.client, message)
-                        else:
-                            single_messages.append(message)
-                    if limitation.views_difference:
-                        logging.info(f'Checking views difference {limitation.views_difference}')
-                        if post := await models.PostCheck.objects.filter(channel=channel, post_id=message.id).afirst():
-                            if post.last_check < now - timedelta(minutes=limitation.views_difference_interval) \
-                                    and (message.views - post.views) * 100 / post.views > limitation.views_difference:
-                                logging.info(f'Found views difference {limitation.views_difference}')
-                                if message.grouped_id and channel.delete_albums:
-                                    if message.grouped_id not in grouped_messages:
-                                        grouped_messages[message.grouped_id] = await utils.collect_media_group(self.client, message)
-                                else:
-                                    single_messages.append(message)
-                                post.last_check = now
-                                await post.asave()
-                        else:
-                            await models.PostCheck.objects.acreate(post_date=message.date, post_id=message.id, views=message.views)
-
-        logging.info(f'Found {len(single_messages)} single messages and {len(grouped_messages)} grouped messages')
-        for message in single_messages:
-            await models.Log.objects.acreate(
-                type=Log.DELETION,
-                userbot=self.userbot,
-                channel=channel,
-                post_id=message.id,
-                post_date=message.date,
-                post_views=message.views,
-            )
-            if channel.republish_today_posts and message.date.date() == now.date():
-                if channel.has_protected_content:
-                    if isinstance(message.media, MessageMediaPhoto):
-                        # noinspection PyTypeChecker
-                        photo: BytesIO = await self.client.download_media(message, bytes)
-                        await self.client.send_message(channel.v2_id, message.message, file=photo)
-                    elif message.message:
-                        await self.client.send_message(channel.v2_id, message.message)
-                else:
-                    await self.client.send_message(channel.v2_id, message)
-                await sleep(1)
-            await self.client.delete_messages(channel.v2_id, message.id)
-            await sleep(1)
-        for grouped_message in grouped_messages.values():
-            await models.Log.objects.acreate(
-                type=Log.DELETION,
-                userbot=self.userbot,
-                channel=channel,
-                post_id=grouped_message[0].id,
-                post_date=grouped_message[0].date,
-                post_views=grouped_message[0].views,
-            )
-            if channel.republish_today_posts and grouped_message[0].date.date() == now.date():
-                if channel.has_protected_content:
-                    # send only first photo from group
-                    photo_msgs: list[types.Message] = list(filter(lambda x: x.photo, grouped_message))
-                    # noinspection PyTypeChecker
-                    photo: BytesIO = await self.client.download_media(photo_msgs[0], bytes) if photo_msgs else None
-                    caption_msgs: list[types.Message] = list(filter(lambda x: x.message, grouped_message))
-                    caption = caption_msgs[0].message if caption_msgs else ''
-                    if photo:
-                        await self.client.send_message(channel.v2_id, caption, file=photo)
-                    elif caption:
-                        await self.client.send_message(channel.v2_id, caption)
                 else:
-                    await self.client.send_message(channel.v2_id, grouped_message[0])
-            await sleep(1)
-            await self.client.delete_messages(channel.v2_id, [message.id for message in grouped_message])
-            await sleep(1)
+                    new_post_checks.append(models.PostCheck(channel=channel, post_date=message.date, post_id=message.id, views=message.views))
+        if new_post_checks:
+            await models.PostCheck.objects.abulk_create(new_post_checks, ignore_conflicts=True)
+        if changed_post_checks:
+            await models.PostCheck.objects.abulk_update(changed_post_checks, ['last_check'])
+
+        if flagged_posts:
+            self.queue_post_removal(channel, list(flagged_posts.values()))
+
+    def queue_post_removal(self, channel: models.Channel, posts: list[Post]):
+        # republishing and deletion run in a background lane per channel, so the scan only reads
+        pending = self.pending_removals.setdefault(channel.channel_id, set())
+        posts = [post for post in posts if post.id not in pending]
+        if not posts:
+            return
+        pending.update(post.id for post in posts)
+        self.removal_queues.setdefault(channel.channel_id, Queue()).put_nowait((channel, posts))
+        worker = self.removal_workers.get(channel.channel_id)
+        if worker is None or worker.done():
+            self.removal_workers[channel.channel_id] = create_task(self.process_post_removals(channel.channel_id))
+
+    async def process_post_removals(self, channel_id: int):
+        queue = self.removal_queues[channel_id]
+        uploaded: dict[int, types.TypeInputFile] = {}  # {photo_id: uploaded file} reused until the queue is drained
+        while not queue.empty():
+            channel, posts = queue.get_nowait()
+            try:
+                single_messages, grouped_messages = await self.fetch_flagged_messages(channel, posts)
+                logging.info(f'Found {len(single_messages)} single messages and {len(grouped_messages)} grouped messages')
+                await self.delete_posts(channel, [[message] for message in single_messages] + list(grouped_messages.values()), uploaded)
+            except Exception as e:
+                logging.exception(f'Removing posts from channel {channel_id} failed: {e}')
+            finally:
+                self.pending_removals[channel_id].difference_update(post.id for post in posts)
+
+    async def upload_photo(self, message: types.Message, uploaded: dict[int, types.TypeInputFile]):
+        # the photo is streamed through a temporary file instead of being held in memory,
+        # photos already uploaded during the current run are reused
+        if message.photo.id not in uploaded:
+            with TemporaryDirectory() as directory:
+                path = await self.client.download_media(message, directory)
+                uploaded[message.photo.id] = await self.client.upload_file(path)
+        return uploaded[message.photo.id]
+
+    async def republish_post(self, channel: models.Channel, messages: list[types.Message], uploaded: dict[int, types.TypeInputFile]):
+        if not channel.has_protected_content:
+            await self.client.send_message(channel.v2_id, messages[0])
+        elif len(messages) == 1:
+            message = messages[0]
+            if isinstance(message.media, MessageMediaPhoto) and message.photo:
+                photo = await self.upload_photo(message, uploaded)
+                await self.client.send_message(channel.v2_id, message.message, file=photo)
+            elif message.message:
+                await self.client.send_message(channel.v2_id, message.message)
+        else:
+            # send only first photo from group
+            photo_msgs: list[types.Message] = list(filter(lambda x: x.photo, messages))
+            photo = await self.upload_photo(photo_msgs[0], uploaded) if photo_msgs else None
+            caption_msgs: list[types.Message] = list(filter(lambda x: x.message, messages))
+            caption = caption_msgs[0].message if caption_msgs else ''
+            if photo:
+                await self.client.send_message(channel.v2_id, caption, file=photo)
+            elif caption:
+                await self.client.send_message(channel.v2_id, caption)
+
+    async def delete_posts(self, channel: models.Channel, posts: list[list[types.Message]],
+                           uploaded: dict[int, types.TypeInputFile] = None):
+        if not posts:
+            return
+        if uploaded is None:
+            uploaded = {}
+        now = datetime.now(timezone.utc)
+        await models.Log.objects.abulk_create([models.Log(
+            type=Log.DELETION,
+            userbot=self.userbot,
+            channel=channel,
+            post_id=post[0].id,
+            post_date=post[0].date,
+            post_views=post[0].views,
+        ) for post in posts])
+        for post in posts:
+            if channel.republish_today_posts and post[0].date.date() == now.date():
+                await utils.retry_flood_wait(self.republish_post, channel, post, uploaded)
+
+        # single posts are coalesced into batches, where the affected count is the number of deleted posts,
+        # albums are deleted one per request and count as one post if anything was deleted
+        singles = [post[0] for post in posts if len(post) == 1]
+        batches: list[list[int]] = [[x.id for x in singles[i:i + utils.MESSAGES_CHUNK_SIZE]]
+                                    for i in range(0, len(singles), utils.MESSAGES_CHUNK_SIZE)]
+        albums: list[list[int]] = [[x.id for x in post] for post in posts if len(post) > 1]
+
+        cursor = self.cursors.get(channel.channel_id)
+        deleted_posts = 0
+        for ids, album in [(x, False) for x in batches] + [(x, True) for x in albums]:
+            affected = await utils.retry_flood_wait(self.client.delete_messages, channel.v2_id, ids)
+            # messages already deleted by another userbot are not affected, so they are not counted again
+            pts_count = sum(x.pts_count for x in affected)
+            deleted_posts += min(pts_count, 1) if album else pts_count
+            if cursor:
+                for message_id in ids:
+                    cursor.remove(message_id)
+        logging.info(f'Deleted {deleted_posts} posts in {len(batches) + len(albums)} requests from channel {channel.channel_id}')
+        if deleted_posts:
+            await utils.increment_daily_counter(channel, 'deletions', deleted_posts)
 
     async def handle_view_limitation(self, channel, current_views, max_views, hourly_distribution):
         if hourly_distribution:
@@ -409,126 +758,198 @@ class App:
         logging.info(f'Views: {current_views}, max views: {max_views}')
         if current_views > max_views:
             comment = f'Views {current_views} > limit {max_views}'
-            await self.change_username_by_limit(channel, UsernameChangeReason.LANGUAGE_STATS_VIEWS_LIMIT, comment,
-                                                current_views, max_views)
-            await sleep(30)
+            self.queue_username_change(channel, UsernameChangeReason.LANGUAGE_STATS_VIEWS_LIMIT, comment,
+                                       current_views, max_views)
             return True
         return False
 
-    async def handle_view_diff_limitation(self, channel, language, current_views, max_diff, interval):
+    async def get_stats_baselines(self, channel: models.Channel) -> dict[str | None, models.StatsViews]:
+        # latest baseline of today for every language (None is all languages, '*' the others) in one query
+        today_start, today_end = utils.day_range()
+        queryset = models.StatsViews.objects \
+            .filter(channel=channel, created__gte=today_start, created__lt=today_end) \
+            .order_by('language', '-created').distinct('language')
+        return {x.language: x async for x in queryset}
+
+    async def handle_view_diff_limitation(self, channel, baselines, language, current_views, max_diff, interval):
         if current_views == 0:
             return False
-        last_views: models.StatsViews = await models.StatsViews.objects \
-            .filter(channel=channel, language=language, created__gte=utils.day_start()) \
-            .order_by('-created').afirst()
+        last_views: models.StatsViews = baselines.get(language)
         logging.info(f'Language: {language}, current views: {current_views}')
         if not last_views:
-            last_views = await models.StatsViews.objects.acreate(channel=channel, language=language, value=current_views)
+            # new baselines are saved in bulk at the end of the channel pass
+            last_views = baselines[language] = models.StatsViews(
+                channel=channel, language=language, value=current_views, created=datetime.now(timezone.utc)
+            )
         if last_views.created < datetime.now(timezone.utc) - timedelta(minutes=interval):
             percent_diff = (current_views - last_views.value) * 100 / last_views.value
             logging.info(f'Percent: {percent_diff}, max percent: {max_diff}')
             if percent_diff > max_diff:
                 comment = f'Views difference for {language} {percent_diff}% ({last_views.value}|{current_views}) > limit {max_diff}%'
-                await self.change_username_by_limit(channel, UsernameChangeReason.LANGUAGE_STATS_VIEWS_DIFFERENCE_LIMIT,
-                                                    comment, percent_diff, max_diff)
-                await sleep(30)
+                self.queue_username_change(channel, UsernameChangeReason.LANGUAGE_STATS_VIEWS_DIFFERENCE_LIMIT,
+                                           comment, percent_diff, max_diff)
                 return True
         return False
 
     async def check_lang_stats(self):
+        settings = await config.get_settings()
         channels = await self.get_channels(owner=True)
+        semaphore = Semaphore(settings.check_stats_concurrency or 1)
+
+        async def check(channel: models.Channel):
+            async with semaphore:
+                try:
+                    await self.check_channel_lang_stats(channel)
+                except (UnauthorizedError, ConnectionError):
+                    raise
+                except Exception as e:
+                    logging.exception(f'Checking lang stats of {channel.title} failed: {e}')
+
+        await utils.gather_coroutines([check(channel) for channel in channels])
+
+    async def check_channel_lang_stats(self, channel: models.Channel):
+        logging.info(f'Checking channel lang stats {channel.title} ({channel.channel_id})')
+        try:
+            stats, graphs = await self.stats_client.get_stats_with_graphs(channel.v2_id, ['languages_graph'])
+        except ChatAdminRequiredError:
+            logging.warning(f'Cant get stats for {channel.title}')
+            return
+        graph = LanguageGraph(graphs[0], days=1)
+        baselines = await self.get_stats_baselines(channel)
+        try:
+            await self.check_lang_stats_limitations(channel, graph, baselines)
+        finally:
+            new_baselines = [x for x in baselines.values() if x.pk is None]
+            if new_baselines:
+                await models.StatsViews.objects.abulk_create(new_baselines)
+
+    async def check_lang_stats_limitations(self, channel: models.Channel, graph: LanguageGraph,
+                                           baselines: dict[str | None, models.StatsViews]):
         today = datetime.now(timezone.utc).date()
-        for channel in channels:
-            logging.info(f'Checking channel lang stats {channel.title} ({channel.channel_id})')
-            try:
-                stats, graphs = await get_stats_with_graphs(self.client, channel.v2_id, ['languages_graph'])
-            except ChatAdminRequiredError:
-                logging.warning(f'Cant get stats for {channel.title}')
+        for limitation in await config.get_limitations(channel, Limitation.LANGUAGE_STATS):
+            if limitation.start_date and limitation.start_date > today or limitation.end_date and limitation.end_date < today:
                 continue
-            async for limitation in models.Limitation.objects.filter(
-                Q(channel=channel) & Q(type=Limitation.LANGUAGE_STATS) &
-                (Q(start_date__lte=today) | Q(start_date=None)) &
-                (Q(end_date__gte=today) | Q(end_date=None))
-            ).order_by('-created'):
-                lang_stats = utils.LanguageStats()
-                lang_stats.get_languages_graph_views(graphs, days=1)
-                lang_stats.parse_lang_stats_restrictions(limitation.lang_stats_restrictions)
-                if limitation.views:
+            restrictions = limitation.lang_stats_rules
+            if limitation.views:
+                if await self.handle_view_limitation(
+                        channel,
+                        graph.get_total(),
+                        limitation.views,
+                        limitation.hourly_distribution
+                ):
+                    continue
+            if limitation.views_difference:
+                if await self.handle_view_diff_limitation(
+                        channel,
+                        baselines,
+                        None,
+                        graph.get_total(),
+                        limitation.views_difference,
+                        limitation.views_difference_interval
+                ):
+                    continue
+            if '*' in restrictions:
+                max_views = restrictions['*']
+                if max_views > 0:
                     if await self.handle_view_limitation(
                             channel,
-                            lang_stats.get_total(),
-                            limitation.views,
+                            graph.get_others(restrictions),
+                            max_views,
                             limitation.hourly_distribution
                     ):
                         continue
-                if limitation.views_difference:
+                else:  # percentage
                     if await self.handle_view_diff_limitation(
                             channel,
-                            None,
-                            lang_stats.get_total(),
-                            limitation.views_difference,
+                            baselines,
+                            '*',
+                            graph.get_others(restrictions),
+                            -max_views,
                             limitation.views_difference_interval
                     ):
                         continue
-                if '*' in lang_stats.restrictions:
-                    max_views = lang_stats.restrictions['*']
-                    if max_views > 0:
-                        if await self.handle_view_limitation(
-                                channel,
-                                lang_stats.get_others(),
-                                max_views,
-                                limitation.hourly_distribution
-                        ):
-                            continue
-                    else:  # percentage
-                        if await self.handle_view_diff_limitation(
-                                channel,
-                                '*',
-                                lang_stats.get_others(),
-                                -max_views,
-                                limitation.views_difference_interval
-                        ):
-                            continue
-                for lang, views in lang_stats.get_data().items():
-                    if lang not in lang_stats.restrictions:
-                        continue
-                    max_views = lang_stats.restrictions[lang]
-                    if max_views > 0:
-                        if await self.handle_view_limitation(
-                                channel,
-                                views,
-                                max_views,
-                                limitation.hourly_distribution
-                        ):
-                            break
-                    else:  # percentage
-                        if await self.handle_view_diff_limitation(
-                                channel,
-                                lang,
-                                views,
-                                -max_views,
-                                limitation.views_difference_interval
-                        ):
-                            break
-            await sleep(3)
+            for lang, views in graph.get_data():
+                if lang not in restrictions:
+                    continue
+                max_views = restrictions[lang]
+                if max_views > 0:
+                    if await self.handle_view_limitation(
+                            channel,
+                            views,
+                            max_views,
+                            limitation.hourly_distribution
+                    ):
+                        break
+                else:  # percentage
+                    if await self.handle_view_diff_limitation(
+                            channel,
+                            baselines,
+                            lang,
+                            views,
+                            -max_views,
+                            limitation.views_difference_interval
+                    ):
+                        break
+
+    def add_push_handlers(self):
+        self.client.add_event_handler(self.push_post_handler, events.NewMessage(func=lambda e: e.is_channel))
+        self.client.add_event_handler(self.push_views_handler, events.Raw(types.UpdateChannelMessageViews))
+        self.client.add_event_handler(self.push_deletions_handler, events.Raw(types.UpdateDeleteChannelMessages))
+
+    async def push_post_handler(self, event: events.NewMessage.Event):
+        # new posts go straight into the cursor, so the reconciling scan does not fetch them again,
+        # posts pushed without views are left to the scan
+        cursor = self.cursors.get(event.message.peer_id.channel_id)
+        if cursor and event.message.views:
+            cursor.add(event.message)
+
+    async def push_views_handler(self, update: types.UpdateChannelMessageViews):
+        cursor = self.cursors.get(update.channel_id)
+        post = cursor.posts.get(update.id) if cursor else None
+        if post is None or post.views == update.views:
+            return
+        post.views = update.views
+        self.pushed_posts.setdefault(update.channel_id, set()).add(update.id)
+
+    async def push_deletions_handler(self, update: types.UpdateDeleteChannelMessages):
+        if cursor := self.cursors.get(update.channel_id):
+            for message_id in update.messages:
+                cursor.remove(message_id)
+        self.pushed_deletions.add(update.channel_id)
+
+    async def flush_pushed_updates(self):
+        # updates are checked in batches, so a burst of view updates costs one pass per channel
+        pushed_posts, self.pushed_posts = self.pushed_posts, {}
+        pushed_deletions, self.pushed_deletions = self.pushed_deletions, set()
+        if pushed_posts:
+            channels = {x.channel_id: x for x in await self.get_channels()}
+            for channel_id, post_ids in pushed_posts.items():
+                channel, cursor = channels.get(channel_id), self.cursors.get(channel_id)
+                if channel and cursor:
+                    await self.check_posts(channel, [cursor.posts[x] for x in post_ids if x in cursor.posts])
+        if pushed_deletions and self.host:
+            for channel in await self.get_owned_channels():
+                if channel.channel_id in pushed_deletions:
+                    await self.check_channel_deletions(channel)
 
     async def bot_action_handler(self, event: Message | events.NewMessage.Event):
         data: dict = json.loads(event.pattern_match['data'])  # {'action': 'update_username', ...}
 
         response = None
 
-        match data['action']:
-            case 'update_username':
-                response = await self.update_username_message_handler(data, event.sender_id)
-            case 'make_post':
-                response = await self.make_post_message_handler(data)
-            case 'publish_post':
-                response = await self.publish_post_message_handler(data)
-            case _:
-                logging.error(f'Unknown action {data['action']}')
+        with self.client.limiter.priority():
+            match data['action']:
+                case 'update_username':
+                    response = await self.update_username_message_handler(data, event.sender_id)
+                case 'make_post':
+                    response = await self.make_post_message_handler(data)
+                case 'publish_post':
+                    response = await self.publish_post_message_handler(data)
+                case _:
+                    logging.error(f'Unknown action {data['action']}')
 
-        if response:
-            await event.respond(response)
+            if response:
+                await event.respond(response)
 
     async def update_username_message_handler(self, data: dict, sender: int):  # {'channel_id': 1}
         channel_id_v2 = data['channel_id']
@@ -536,7 +957,7 @@ class App:
 
         username = None
         comment = f'Request from {sender}'
-        channel = await database_sync_to_async(models.Channel.objects.get)(channel_id=channel_id_v1)
+        channel = await config.get_channel(channel_id_v1)
 
         if await utils.is_username_change_unlocked(channel):
             username = await self.change_username(channel, UsernameChangeReason.THIRD_PARTY_REQUEST, comment, ignore_wait=True)
@@ -545,7 +966,7 @@ class App:
         return f'/update_username {result}'
 
     async def make_post_message_handler(self, data: dict):  # {'album_ids': [1, 2, 3], 'text_id': 1, 'bot_user_id': 1}
-        settings = await database_sync_to_async(models.Settings.objects.get)()
+        settings = await config.get_settings()
 
         album_messages = await self.client.get_messages(settings.archive_channel, ids=data['album_ids']) if data.get('album_ids') else None
         text_message = await self.client.get_messages(settings.archive_channel, ids=data['text_id'])
@@ -569,7 +990,7 @@ class App:
         return f'/make_post {result}'
 
     async def publish_post_message_handler(self, data: dict):  # {'message_ids': [1, 2, 3], 'channel_id': 1, 'ad_id': 1}
-        settings = await database_sync_to_async(models.Settings.objects.get)()
+        settings = await config.get_settings()
 
         messages = await self.client.get_messages(settings.archive_channel, ids=data['message_ids'])
         result = await self.client.send_message(data['channel_id'], messages[0].message, file=messages if messages[0].media else None)
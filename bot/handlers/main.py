@@ -1,9 +1,70 @@
 import asyncio
+import logging
+import multiprocessing
+import multiprocessing.connection
+import sys
+import time
+from django.db import connections
+from telethon import errors
 from bot import utils
 from .app import App
 
+RESTART_BACKOFF_BASE = 5
+RESTART_BACKOFF_MAX = 300
+RESTART_RESET_TIME = 600  # an account running this long before failing starts the backoff over
+
 
 def main(phone_number: str, host: bool, func: int):
     utils.init_logger(phone_number)
     app = App(phone_number, host, func)
     asyncio.run(app.start())
+
+
+async def run_app(phone_number: str, host: bool, func: int):
+    # each account restarts on its own, so one failing account does not take down the rest of the group
+    utils.phone_number_var.set(phone_number)
+    failures = 0
+    while True:
+        app = App(phone_number, host, func)
+        started = time.monotonic()
+        try:
+            await app.start()
+            logging.warning(f'{phone_number} stopped, restarting')
+        except (errors.BadRequestError, errors.UnauthorizedError) as e:
+            logging.error(f'{phone_number} {e}')
+            return
+        except Exception as e:
+            logging.exception(f'{phone_number} failed: {e}')
+        finally:
+            await app.stop()
+        failures = 1 if time.monotonic() - started > RESTART_RESET_TIME else failures + 1
+        await asyncio.sleep(min(RESTART_BACKOFF_BASE * 2 ** (failures - 1), RESTART_BACKOFF_MAX))
+
+
+async def run_group(accounts: list[tuple[str, bool, int]]):
+    await asyncio.gather(*[run_app(phone_number, host, func) for phone_number, host, func in accounts])
+
+
+def main_group(accounts: list[tuple[str, bool, int]], processes: int = 1):
+    # all accounts of a process share one event loop, Django setup, database connection and config cache
+    utils.init_logger()
+    processes = max(1, min(processes, len(accounts)))
+    if processes == 1:
+        asyncio.run(run_group(accounts))
+        return
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=main_group, args=(accounts[i::processes],)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    remaining = {worker.sentinel: worker for worker in workers}
+    while remaining:
+        for sentinel in multiprocessing.connection.wait(list(remaining)):
+            worker = remaining.pop(sentinel)
+            worker.join()
+            if worker.exitcode != 0:
+                # a dead worker is not restarted here, exit so that the whole group is restarted
+                logging.critical(f'Worker {worker.pid} exited with code {worker.exitcode}, stopping the group')
+                for other in remaining.values():
+                    other.terminate()
+                sys.exit(1)
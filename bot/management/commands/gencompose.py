@@ -1,7 +1,7 @@
 import copy
 import yaml
 from django.core.management.base import BaseCommand
-from app.settings import BASE_DIR, USERBOT_PN_LIST, USERBOT_HOST_LIST, HOST_FUNC_COUNT
+from app.settings import BASE_DIR, USERBOT_PN_LIST, USERBOT_HOST_LIST, HOST_FUNC_COUNT, HOST_FUNC_COMBINED
 
 
 COMPOSES = [
@@ -16,14 +16,18 @@ def get_service_name(phone: str, host: bool, func: int) -> str:
     return f'{prefix}{func}_{sanitized}'
 
 
-def gen_compose(compose: dict):
-    with open(compose['base'], 'r') as f:
-        base = yaml.safe_load(f)
+def get_host_funcs(combined_host: bool) -> list[int]:
+    return [HOST_FUNC_COMBINED] if combined_host else [func + 1 for func in range(HOST_FUNC_COUNT)]
+
+
+def get_accounts(combined_host: bool) -> list[tuple[str, bool, int]]:
+    accounts = [(phone, False, 0) for phone in USERBOT_PN_LIST]
+    for phone in USERBOT_HOST_LIST:
+        accounts += [(phone, True, func) for func in get_host_funcs(combined_host)]
+    return accounts
 
-    bot_base = base.get('x-bot-base')
-    services = base.get('services')
-    networks = base.get('networks')
 
+def gen_services(bot_base: dict, services: dict, combined_host: bool):
     for phone in USERBOT_PN_LIST:
         service_name = get_service_name(phone, False, 1)
         services[service_name] = copy.deepcopy(bot_base) | {
@@ -35,16 +39,42 @@ def gen_compose(compose: dict):
         }
 
     for phone in USERBOT_HOST_LIST:
-        for func in range(HOST_FUNC_COUNT):
-            service_name = get_service_name(phone, True, func + 1)
+        for func in get_host_funcs(combined_host):
+            service_name = get_service_name(phone, True, func)
             services[service_name] = copy.deepcopy(bot_base) | {
                 'environment': {
                     'PHONE_NUMBER': phone,
                     'HOST': '1',
-                    'FUNC': str(func + 1)
+                    'FUNC': str(func)
                 }
             }
 
+
+def gen_grouped_services(bot_base: dict, services: dict, group_size: int, combined_host: bool):
+    accounts = get_accounts(combined_host)
+    for i in range(0, len(accounts), group_size):
+        group = accounts[i:i + group_size]
+        services[f'group{i // group_size + 1}'] = copy.deepcopy(bot_base) | {
+            'command': 'uv run manage.py startgroup',
+            'environment': {
+                'ACCOUNTS': ','.join(f'{phone}:{int(host)}:{func}' for phone, host, func in group),
+            }
+        }
+
+
+def gen_compose(compose: dict, group_size: int = 0, combined_host: bool = False):
+    with open(compose['base'], 'r') as f:
+        base = yaml.safe_load(f)
+
+    bot_base = base.get('x-bot-base')
+    services = base.get('services')
+    networks = base.get('networks')
+
+    if group_size > 0:
+        gen_grouped_services(bot_base, services, group_size, combined_host)
+    else:
+        gen_services(bot_base, services, combined_host)
+
     generated = {
         'services': services,
         'networks': networks,
@@ -57,6 +87,10 @@ def gen_compose(compose: dict):
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--group-size', type=int, default=0, help='run this many accounts per service, 0 for one per service')
+        parser.add_argument('--combined-host', action='store_true', help='run host func 1 and func 2 on one connection')
+
     def handle(self, *args, **options):
         for compose in COMPOSES:
-            gen_compose(compose)
+            gen_compose(compose, options['group_size'], options['combined_host'])
@@ -0,0 +1,22 @@
+import os
+import logging
+from django.core.management.base import BaseCommand
+from bot import handlers
+
+
+def parse_accounts(value: str) -> list[tuple[str, bool, int]]:  # '+123:0:0,+456:1:2'
+    accounts = []
+    for account in filter(None, value.split(',')):
+        phone_number, host, func = account.strip().split(':')
+        accounts.append((phone_number, host == '1', int(func)))
+    return accounts
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=int(os.environ.get('PROCESSES', 1)))
+
+    def handle(self, *args, **options):
+        accounts = parse_accounts(os.environ['ACCOUNTS'])
+        logging.info(f'Starting {len(accounts)} accounts in {options["processes"]} processes')
+        handlers.main_group(accounts, options['processes'])
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+def remove_duplicate_post_checks(apps, schema_editor):
+    PostCheck = apps.get_model('bot', 'PostCheck')
+    seen = set()
+    duplicates = []
+    for pk, channel_id, post_id in PostCheck.objects.order_by('id').values_list('id', 'channel_id', 'post_id').iterator():
+        if (channel_id, post_id) in seen:
+            duplicates.append(pk)
+        else:
+            seen.add((channel_id, post_id))
+    PostCheck.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_userbot_channels'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_post_checks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postcheck',
+            constraint=models.UniqueConstraint(fields=('channel', 'post_id'), name='unique_channel_post_check'),
+        ),
+    ]
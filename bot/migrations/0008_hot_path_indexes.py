@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0007_postcheck_unique_channel_post'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='excess',
+            index=models.Index(fields=['channel', 'type', 'created'], name='excess_chan_type_crtd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='log',
+            index=models.Index(fields=['channel', 'type', 'success', 'created'], include=('post_id',), name='log_chan_type_succ_crtd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statsviews',
+            index=models.Index(fields=['channel', 'language', 'created'], name='statsviews_chan_lang_crtd_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 10:44
+
+import django.db.models.deletion
+from datetime import datetime, timedelta, timezone
+from django.db import migrations, models
+
+
+def backfill_today_counters(apps, schema_editor):
+    Log = apps.get_model('bot', 'Log')
+    DailyCounter = apps.get_model('bot', 'DailyCounter')
+    now = datetime.now(timezone.utc)
+    start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+    logs = Log.objects.filter(channel__isnull=False, success=True, created__gte=start, created__lt=start + timedelta(days=1))
+    deletions = logs.filter(type='DELETION').values('channel_id').annotate(value=models.Count('post_id', distinct=True))
+    username_changes = logs.filter(type='USERNAME_CHANGE').values('channel_id').annotate(value=models.Count('id'))
+    counters = {}
+    for row in deletions:
+        counters.setdefault(row['channel_id'], DailyCounter(channel_id=row['channel_id'], date=start.date())).deletions = row['value']
+    for row in username_changes:
+        counters.setdefault(row['channel_id'], DailyCounter(channel_id=row['channel_id'], date=start.date())).username_changes = row['value']
+    DailyCounter.objects.bulk_create(counters.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date_utc')),
+                ('deletions', models.PositiveIntegerField(default=0, verbose_name='deletions')),
+                ('username_changes', models.PositiveIntegerField(default=0, verbose_name='username_changes')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bot.channel', verbose_name='channel')),
+            ],
+            options={
+                'verbose_name': 'daily_counter',
+                'verbose_name_plural': 'daily_counters',
+                'ordering': ('-date',),
+                'constraints': [models.UniqueConstraint(fields=('channel', 'date'), name='unique_channel_daily_counter')],
+            },
+        ),
+        migrations.RunPython(backfill_today_counters, migrations.RunPython.noop),
+    ]
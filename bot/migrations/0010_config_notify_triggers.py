@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.db import migrations
+
+TABLES = ['bot_settings', 'bot_channel', 'bot_limitation']
+
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION bot_config_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('bot_config', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGERS = """
+CREATE TRIGGER {table}_config_notify_update AFTER UPDATE ON {table}
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bot_config_notify();
+CREATE TRIGGER {table}_config_notify_insert_delete AFTER INSERT OR DELETE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION bot_config_notify();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS {table}_config_notify_update ON {table};
+DROP TRIGGER IF EXISTS {table}_config_notify_insert_delete ON {table};
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_dailycounter'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FUNCTION, 'DROP FUNCTION IF EXISTS bot_config_notify();'),
+        *[migrations.RunSQL(CREATE_TRIGGERS.format(table=table), DROP_TRIGGERS.format(table=table)) for table in TABLES],
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0010_config_notify_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='check_stats_concurrency',
+            field=models.PositiveSmallIntegerField(default=4, verbose_name='check_stats_concurrency'),
+        ),
+    ]
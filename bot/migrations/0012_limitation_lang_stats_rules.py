@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+def parse_lang_stats_restrictions(restrictions: str | None) -> dict[str, int]:
+    # {'English': 1000, 'Russian': -5} (minus means percentage)
+    result = {}
+    for restriction in (restrictions or '').split('\n'):
+        split = restriction.split()
+        if len(split) != 2:
+            continue
+        lang, value = split
+        if value[-1] == '%':
+            value = '-' + value[:-1]
+        try:
+            result[lang.capitalize()] = int(value)
+        except ValueError:
+            continue
+    return result
+
+
+def compile_lang_stats_rules(apps, schema_editor):
+    Limitation = apps.get_model('bot', 'Limitation')
+    limitations = list(Limitation.objects.exclude(lang_stats_restrictions=None).exclude(lang_stats_restrictions=''))
+    for limitation in limitations:
+        limitation.lang_stats_rules = parse_lang_stats_restrictions(limitation.lang_stats_restrictions)
+    Limitation.objects.bulk_update(limitations, ['lang_stats_rules'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0011_settings_check_stats_concurrency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='limitation',
+            name='lang_stats_rules',
+            field=models.JSONField(default=dict, editable=False, verbose_name='lang_stats_rules'),
+        ),
+        migrations.RunPython(compile_lang_stats_rules, migrations.RunPython.noop),
+    ]
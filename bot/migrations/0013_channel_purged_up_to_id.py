@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0012_limitation_lang_stats_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='purged_up_to_id',
+            field=models.PositiveBigIntegerField(default=0, help_text='purged_up_to_message_id_help_text', verbose_name='purged_up_to_message_id'),
+        ),
+    ]
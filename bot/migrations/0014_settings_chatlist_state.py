@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0013_channel_purged_up_to_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='chatlist_channels',
+            field=models.JSONField(default=list, editable=False, verbose_name='chatlist_channels'),
+        ),
+        migrations.AddField(
+            model_name='settings',
+            name='chatlist_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='chatlist_version'),
+        ),
+    ]
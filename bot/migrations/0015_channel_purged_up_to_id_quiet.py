@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+# the purge mark is process state of the host, its saves must not reload the config of all processes
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION bot_channel_config_notify() RETURNS trigger AS $$
+BEGIN
+    IF to_jsonb(OLD) - 'purged_up_to_id' IS DISTINCT FROM to_jsonb(NEW) - 'purged_up_to_id' THEN
+        PERFORM pg_notify('bot_config', TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGER = """
+DROP TRIGGER IF EXISTS bot_channel_config_notify_update ON bot_channel;
+CREATE TRIGGER bot_channel_config_notify_update AFTER UPDATE ON bot_channel
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bot_channel_config_notify();
+"""
+
+RESTORE_TRIGGER = """
+DROP TRIGGER IF EXISTS bot_channel_config_notify_update ON bot_channel;
+CREATE TRIGGER bot_channel_config_notify_update AFTER UPDATE ON bot_channel
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bot_config_notify();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0014_settings_chatlist_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='channel',
+            name='purged_up_to_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='purged_up_to_message_id_help_text', verbose_name='purged_up_to_message_id'),
+        ),
+        migrations.RunSQL(CREATE_FUNCTION, 'DROP FUNCTION IF EXISTS bot_channel_config_notify();'),
+        migrations.RunSQL(CREATE_TRIGGER, RESTORE_TRIGGER),
+    ]
@@ -1,4 +1,5 @@
 from .channel import Channel
+from .daily_counter import DailyCounter
 from .excess import Excess
 from .limitation import Limitation
 from .log import Log
@@ -15,6 +15,8 @@ class Channel(models.Model):
     deletions_count_for_username_change = models.PositiveSmallIntegerField(_('deletions_count_for_username_change'), default=0)
     deletions_count_for_username_change.help_text = _('deletions_count_for_username_change_help_text')
     delete_posts_after_days = models.PositiveSmallIntegerField(_('delete_all_posts_after_days'), default=90)
+    purged_up_to_id = models.PositiveBigIntegerField(_('purged_up_to_message_id'), default=0, editable=False)
+    purged_up_to_id.help_text = _('purged_up_to_message_id_help_text')
 
     @property
     def v2_id(self):
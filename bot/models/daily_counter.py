@@ -0,0 +1,18 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class DailyCounter(models.Model):
+    date = models.DateField(_('date_utc'))
+    channel = models.ForeignKey('Channel', models.CASCADE, verbose_name=_('channel'))
+    deletions = models.PositiveIntegerField(_('deletions'), default=0)
+    username_changes = models.PositiveIntegerField(_('username_changes'), default=0)
+
+    def __str__(self):
+        return f'{self.channel} - {self.date}'
+
+    class Meta:
+        ordering = ('-date',)
+        verbose_name = _('daily_counter')
+        verbose_name_plural = _('daily_counters')
+        constraints = [models.UniqueConstraint(fields=['channel', 'date'], name='unique_channel_daily_counter')]
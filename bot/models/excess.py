@@ -15,5 +15,6 @@ class Excess(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [models.Index(fields=['channel', 'type', 'created'], name='excess_chan_type_crtd_idx')]
         verbose_name = _('excess')
         verbose_name_plural = _('excesses')
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from bot import types
+from bot.utils_lib.restrictions import parse_lang_stats_restrictions
 
 
 class Limitation(models.Model):
@@ -15,6 +16,7 @@ class Limitation(models.Model):
     views_difference_interval = models.PositiveSmallIntegerField(_('limitation_views_difference_interval_minutes'), default=60)
     lang_stats_restrictions = models.TextField(_('lang_stats_restrictions'), max_length=256, blank=True, null=True)
     lang_stats_restrictions.help_text = _('lang_stats_restrictions_help_text')
+    lang_stats_rules = models.JSONField(_('lang_stats_rules'), default=dict, editable=False)
     hourly_distribution = models.BooleanField(_('hourly_distribution'), default=False)
     hourly_distribution.help_text = _('hourly_distribution_help_text')
     start_date = models.DateField(_('start_date_utc'), blank=True, null=True)
@@ -54,6 +56,14 @@ class Limitation(models.Model):
             return now_date - timedelta(days=self.end_after_days)
         return now_date
 
+    def save(self, *args, **kwargs):
+        # restrictions are compiled once here instead of being parsed on every stats check
+        self.lang_stats_rules = parse_lang_stats_restrictions(self.lang_stats_restrictions)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'lang_stats_restrictions' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'lang_stats_rules'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return str(self.channel)
 
@@ -26,5 +26,6 @@ class Log(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [models.Index(fields=['channel', 'type', 'success', 'created'], include=['post_id'], name='log_chan_type_succ_crtd_idx')]
         verbose_name = _('log')
         verbose_name_plural = _('logs')
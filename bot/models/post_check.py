@@ -14,5 +14,6 @@ class PostCheck(models.Model):
 
     class Meta:
         ordering = ('-post_date',)
+        constraints = [models.UniqueConstraint(fields=['channel', 'post_id'], name='unique_channel_post_check')]
         verbose_name = _('post')
         verbose_name_plural = _('posts')
@@ -11,10 +11,13 @@ class Settings(SingletonModel):
     check_post_views_interval = models.PositiveSmallIntegerField(_('check_post_views_interval_seconds'), default=60)
     check_post_deletions_interval = models.PositiveSmallIntegerField(_('check_post_deletions_interval_seconds'), default=60)
     check_stats_interval = models.PositiveSmallIntegerField(_('check_stats_interval_seconds'), default=120)
+    check_stats_concurrency = models.PositiveSmallIntegerField(_('check_stats_concurrency'), default=4)
     delete_old_posts_interval = models.PositiveSmallIntegerField(_('delete_old_posts_interval_minutes'), default=60)
     username_change_cooldown = models.PositiveSmallIntegerField(_('username_change_cooldown_minutes'), default=120)
     individual_allocations = models.BooleanField(_('individual_allocations'), default=False)
     individual_allocations.help_text = _('individual_allocations_help_text')
+    chatlist_version = models.PositiveIntegerField(_('chatlist_version'), default=0, editable=False)
+    chatlist_channels = models.JSONField(_('chatlist_channels'), default=list, editable=False)  # [channel_id, ...]
 
     def __str__(self):
         return str(_('settings'))
@@ -13,5 +13,6 @@ class StatsViews(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [models.Index(fields=['channel', 'language', 'created'], name='statsviews_chan_lang_crtd_idx')]
         verbose_name = _('view')
         verbose_name_plural = _('views')
@@ -1,3 +1,146 @@
-from django.test import TestCase
+import asyncio
+import random
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.test import SimpleTestCase
+from telethon.sessions import MemorySession
+from telethon.tl.types import InputPeerChannel, Message, PeerChannel
+from bot import models, types
+from bot.handlers.app import App
+from bot.utils_lib.client import UserbotClient
+from bot.utils_lib.limits import LimitationIndex
+from bot.utils_lib.ratelimit import TokenBucket, priority_var
+from bot.utils_lib.scanner import ChannelCursor
 
-# Create your tests here.
+
+def random_limitation(rnd: random.Random):
+    today = datetime.now(timezone.utc).date()
+    limitation = models.Limitation(
+        type=types.Limitation.POST_VIEWS,
+        views=rnd.choice([0, rnd.randint(1, 10000)]),
+        views_difference=rnd.choice([0, rnd.randint(1, 100)]),
+        views_difference_interval=rnd.randint(1, 120),
+    )
+    if rnd.random() < 0.5:
+        limitation.start_date = today - timedelta(days=rnd.randint(0, 60))
+    elif rnd.random() < 0.5:
+        limitation.start_after_days = rnd.randint(1, 60)
+    if rnd.random() < 0.5:
+        limitation.end_date = today - timedelta(days=rnd.randint(0, 60))
+    elif rnd.random() < 0.5:
+        limitation.end_after_days = rnd.randint(1, 60)
+    return limitation
+
+
+def lookup_by_loop(limitations: list, date):
+    # the per-post priority loop the index replaced
+    applied = []
+    for limitation in limitations:
+        if not limitation.start <= date <= limitation.end:
+            continue
+        if any(
+            lim.start <= date <= lim.end and lim.priority < limitation.priority and
+            bool(lim.views) == bool(limitation.views) and
+            bool(lim.views_difference) == bool(limitation.views_difference)
+            for lim in limitations
+        ):
+            continue
+        applied.append(limitation)
+    views = min((x.views for x in applied if x.views), default=0)
+    views_difference = sorted((x.views_difference, x.views_difference_interval) for x in applied if x.views_difference)
+    return views, views_difference
+
+
+class LimitationIndexTest(SimpleTestCase):
+    def test_lookup_matches_loop(self):
+        rnd = random.Random(0)
+        today = datetime.now(timezone.utc).date()
+        for _ in range(200):
+            limitations = [random_limitation(rnd) for _ in range(rnd.randint(0, 8))]
+            index = LimitationIndex(limitations)
+            for days in range(-1, 70):
+                date = today - timedelta(days=days)
+                rules = index.lookup(date)
+                result = (rules.views, sorted(rules.views_difference)) if rules else (0, [])
+                self.assertEqual(result, lookup_by_loop(limitations, date), f'{date}')
+
+    def test_lookup_is_one_bisect_over_interval_points(self):
+        rnd = random.Random(0)
+        today = datetime.now(timezone.utc).date()
+        for count in (10, 100, 1000):
+            index = LimitationIndex([random_limitation(rnd) for _ in range(count)])
+            self.assertLessEqual(len(index.points), 2 * count)
+            self.assertEqual(len(index.rules), len(index.points))
+            with mock.patch('bot.utils_lib.limits.bisect_right', wraps=bisect_right) as bisect:
+                for days in range(-1, 70):
+                    index.lookup(today - timedelta(days=days))
+            self.assertEqual(bisect.call_count, 71)
+
+class TokenBucketTest(SimpleTestCase):
+    async def test_priority_requests_take_tokens_first(self):
+        bucket = TokenBucket(100, 1)
+        bucket.tokens = 0
+        order = []
+
+        async def take(name: str, priority: bool):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        regular = asyncio.create_task(take('regular', False))
+        await asyncio.sleep(0)
+        await asyncio.gather(take('priority', True), regular)
+        self.assertEqual(order, ['priority', 'regular'])
+
+
+class ChannelCursorTest(SimpleTestCase):
+    def message(self, message_id: int, views: int | None):
+        return Message(message_id, PeerChannel(1), datetime.now(timezone.utc), '', views=views)
+
+    def test_message_without_views_does_not_move_cursor(self):
+        cursor = ChannelCursor()
+        cursor.add(self.message(10, 5))
+        cursor.add(self.message(11, None))
+        self.assertEqual(cursor.max_id, 10)
+        self.assertEqual(list(cursor.posts), [10])
+
+
+class ResolveEntitiesTest(SimpleTestCase):
+    def make_app(self, session: MemorySession):
+        app = App.__new__(App)
+        app.client = UserbotClient(session, 1, 'hash')
+        app.host, app.func, app.combined = True, 2, False
+        return app
+
+    async def resolve(self, app: App, channels: list):
+        with mock.patch('bot.handlers.app.config.get_settings', mock.AsyncMock(return_value=models.Settings())), \
+                mock.patch.object(App, 'get_owned_channels', mock.AsyncMock(return_value=channels)), \
+                mock.patch.object(app.client, 'load_dialogs', mock.AsyncMock()) as load_dialogs:
+            await app.resolve_entities()
+        return load_dialogs
+
+    async def test_known_peers_are_resolved_from_session(self):
+        session = MemorySession()
+        session.process_entities([InputPeerChannel(1234567890, 555)])
+        load_dialogs = await self.resolve(self.make_app(session), [models.Channel(channel_id=1234567890)])
+        load_dialogs.assert_not_awaited()
+
+    async def test_missing_peers_load_dialogs(self):
+        load_dialogs = await self.resolve(self.make_app(MemorySession()), [models.Channel(channel_id=1234567890)])
+        load_dialogs.assert_awaited_once()
+
+
+class UsernamePoolRefillTest(SimpleTestCase):
+    async def test_refill_does_not_inherit_priority(self):
+        app = App.__new__(App)
+        app.client = UserbotClient(MemorySession(), 1, 'hash')
+        app.username_pool_refills = {}
+        priorities = []
+
+        async def refill(channel):
+            priorities.append(priority_var.get())
+
+        with mock.patch.object(app, 'refill_username_pool', refill), app.client.limiter.priority():
+            app.schedule_username_pool_refill(models.Channel(channel_id=1))
+        await app.username_pool_refills[1]
+        self.assertEqual(priorities, [False])
@@ -1,33 +1,29 @@
-import json
 import logging
 import os
 import random
+from contextvars import ContextVar
 from typing import Coroutine, Any
 from asyncio import sleep, gather, create_task
-from datetime import datetime, timedelta, timezone, date as date_t
-from telethon import TelegramClient, types
+from datetime import datetime, timedelta, timezone
+from telethon import types
 from telethon.errors import FloodWaitError
+from django.db.models import F
 from app.settings import MAX_SLEEP_TIME
 from bot import models
+from bot.config import config
 
+MESSAGES_CHUNK_SIZE = 100  # max message ids in a single messages request
 
-async def loop_wrapper(func, sleep_time, *args, **kwargs):
+
+async def retry_flood_wait(func, *args, **kwargs):
     while True:
         try:
-            await func(*args, **kwargs)
-            await sleep(random.randint(sleep_time, sleep_time + 16))
+            return await func(*args, **kwargs)
         except FloodWaitError as e:
-            logging.warning(f'Flood wait {e.seconds} seconds')
-            await sleep(min(e.seconds, MAX_SLEEP_TIME))
-        except (ValueError, BufferError) as e:
-            logging.error(e)
-            await sleep(60)
-        except ConnectionError as e:
-            logging.error(e)
-            raise
-        except Exception as e:
-            logging.critical(e)
-            raise
+            if e.seconds > MAX_SLEEP_TIME:
+                raise
+            logging.warning(f'Flood wait {e.seconds} seconds, retrying {func.__name__}')
+            await sleep(e.seconds)
 
 
 async def gather_coroutines(coroutines: list[Coroutine[Any, Any, Any]]):
@@ -43,23 +39,22 @@ async def gather_coroutines(coroutines: list[Coroutine[Any, Any, Any]]):
 
 async def is_username_change_unlocked(channel: models.Channel):
     now = datetime.now(timezone.utc)
-    settings = await models.Settings.objects.aget()
+    settings = await config.get_settings()
     unlocked = (channel.last_username_change is None or
                 channel.last_username_change < now - timedelta(minutes=settings.username_change_cooldown))
     return unlocked
 
 
-async def collect_media_group(client: TelegramClient, post: types.Message):
-    grouped_messages = []
-    async for message in client.iter_messages(
-        post.peer_id,
-        reverse=True,
-        limit=20,
-        offset_id=post.id - 10
-    ):
-        if message.grouped_id == post.grouped_id:
-            grouped_messages.append(message)
-    return grouped_messages
+async def get_daily_counter(channel: models.Channel) -> models.DailyCounter:
+    date = day_start().date()
+    counter = await models.DailyCounter.objects.filter(channel=channel, date=date).afirst()
+    return counter or models.DailyCounter(channel=channel, date=date)
+
+
+async def increment_daily_counter(channel: models.Channel, field: str, value: int = 1):
+    # increment in the database so that concurrent userbot processes never lose updates
+    counter, _ = await models.DailyCounter.objects.aget_or_create(channel=channel, date=day_start().date())
+    await models.DailyCounter.objects.filter(pk=counter.pk).aupdate(**{field: F(field) + value})
 
 
 def get_media_file_id(message: types.Message):
@@ -77,49 +72,6 @@ def get_media_file_id(message: types.Message):
     return media.file_id
 
 
-class LanguageStats:
-    def __init__(self):
-        self.today = datetime.now(timezone.utc).date()
-        self.restrictions: dict[str, int] = {}  # {'English': 1000, 'Russian': -5} (minus means percentage)
-        self.data: dict[date_t, dict[str, int]] = {}  # {'2021-01-21': {'English': 1000, 'Russian': 500}}
-
-    def get_languages_graph_views(self, graphs, days=7):
-        data = json.loads(graphs[0].json.data)
-        now = datetime.now(timezone.utc)
-        for x in range(days):
-            date = now - timedelta(days=days - 1 - x)
-            for y in data['columns'][1:]:
-                curr = y[-days + x]
-                if date.date() not in self.data:
-                    self.data[date.date()] = {}
-                self.data[date.date()][data['names'][y[0]]] = curr
-
-    def parse_lang_stats_restrictions(self, restrictions: str):
-        for restriction in restrictions.split('\n'):
-            split = restriction.split()
-            if len(split) != 2:
-                continue
-            lang, value = split
-            if value[-1] == '%':
-                value = '-' + value[:-1]
-            self.restrictions[lang.capitalize()] = int(value)
-
-    def get_data(self, date: date_t = None):
-        if date is None:
-            date = self.today
-        return self.data[date]
-
-    def get_total(self, date: date_t = None):
-        if date is None:
-            date = self.today
-        return sum(self.data[date].values())
-    
-    def get_others(self, date: date_t = None):
-        if date is None:
-            date = self.today
-        return sum(value for lang, value in self.data[date].items() if lang not in self.restrictions)
-
-
 def rand_username(username: str, suffix_len: int):
     base = username[:-suffix_len]
 
@@ -134,11 +86,25 @@ def rand_username(username: str, suffix_len: int):
     return new_username
 
 
-def init_logger(number):
-    formatter = logging.Formatter(f'%(levelname)s:{number}:%(name)s:%(message)s')
+phone_number_var: ContextVar[str] = ContextVar('phone_number', default='-')
+
+
+class PhoneNumberFilter(logging.Filter):
+    def filter(self, record):
+        record.phone_number = phone_number_var.get()
+        return True
+
+
+def init_logger(number=None):
+    # the number is taken from the context, so several accounts can log from one event loop
+    if number is not None:
+        phone_number_var.set(number)
+    formatter = logging.Formatter('%(levelname)s:%(phone_number)s:%(name)s:%(message)s')
     logger = logging.getLogger()
     for handler in logger.handlers:
         handler.setFormatter(formatter)
+        if not any(isinstance(x, PhoneNumberFilter) for x in handler.filters):
+            handler.addFilter(PhoneNumberFilter())
     return logger
 
 
@@ -148,5 +114,10 @@ def day_start(date: datetime = None):
     return datetime(date.year, date.month, date.day, tzinfo=timezone.utc)
 
 
+def day_range(date: datetime = None):
+    start = day_start(date)
+    return start, start + timedelta(days=1)
+
+
 def remove_file(filename):
     os.remove(filename)
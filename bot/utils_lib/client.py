@@ -0,0 +1,29 @@
+import asyncio
+import logging
+import time
+from telethon import hints, types
+from bot.utils_lib.ratelimit import RateLimitedClient
+
+DIALOGS_RELOAD_INTERVAL = 60
+
+
+class UserbotClient(RateLimitedClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dialogs_loaded = 0.0
+        self.dialogs_lock = asyncio.Lock()
+
+    async def get_input_entity(self, peer: 'hints.EntityLike') -> 'types.TypeInputPeer':
+        try:
+            return await super().get_input_entity(peer)
+        except ValueError:
+            await self.load_dialogs()
+            return await super().get_input_entity(peer)
+
+    async def load_dialogs(self):
+        async with self.dialogs_lock:
+            if time.monotonic() - self.dialogs_loaded < DIALOGS_RELOAD_INTERVAL:
+                return
+            logging.info('Peer is missing from the session, loading dialogs')
+            await self.get_dialogs()
+            self.dialogs_loaded = time.monotonic()
@@ -0,0 +1,29 @@
+import json
+from array import array
+from datetime import datetime, timedelta, timezone
+from telethon import types
+
+
+class LanguageGraph:
+    __slots__ = ('dates', 'languages', 'columns', 'totals')
+
+    def __init__(self, graph: types.StatsGraph, days: int = 7):
+        data = json.loads(graph.json.data)
+        now = datetime.now(timezone.utc).date()
+        self.dates = [now - timedelta(days=days - 1 - x) for x in range(days)]
+        self.languages: list[str] = []
+        self.columns: list[array] = []
+        for column in data['columns'][1:]:
+            self.languages.append(data['names'][column[0]])
+            self.columns.append(array('q', column[-days:]))
+        self.totals = array('q', map(sum, zip(*self.columns))) if self.columns else array('q', [0] * days)
+
+    def get_data(self, day: int = -1):
+        return [(lang, column[day]) for lang, column in zip(self.languages, self.columns)]
+
+    def get_total(self, day: int = -1):
+        return self.totals[day]
+
+    def get_others(self, restrictions: dict[str, int], day: int = -1):
+        restricted = sum(column[day] for lang, column in zip(self.languages, self.columns) if lang in restrictions)
+        return self.totals[day] - restricted
@@ -0,0 +1,50 @@
+from bisect import bisect_right
+from datetime import date as date_t, timedelta
+from typing import Iterable
+
+
+class LimitationRules:
+    __slots__ = ('views', 'views_difference')
+
+    def __init__(self, views: int, views_difference: list[tuple[int, int]]):
+        self.views = views  # lowest views limit of the effective limitations, 0 means no limit
+        self.views_difference = views_difference  # [(percent, interval_minutes), ...]
+
+
+# post views limitations of a channel compiled into date intervals, looked up with one bisect
+class LimitationIndex:
+    def __init__(self, limitations: Iterable):
+        compiled = []
+        points = set()
+        for limitation in limitations:
+            start, end = limitation.start, limitation.end
+            if start > end:
+                continue
+            kind = (bool(limitation.views), bool(limitation.views_difference))
+            compiled.append((start, end, limitation.priority, kind, limitation))
+            points.update((start, end + timedelta(days=1)))
+
+        self.points: list[date_t] = sorted(points)
+        self.rules: list[LimitationRules | None] = []  # rules of [points[i], points[i + 1])
+        for point in self.points:
+            effective = {}  # {kind: (priority, [limitation, ...])} only the highest priority of each kind applies
+            for start, end, priority, kind, limitation in compiled:
+                if not start <= point <= end:
+                    continue
+                best = effective.get(kind)
+                if best is None or priority < best[0]:
+                    effective[kind] = (priority, [limitation])
+                elif priority == best[0]:
+                    best[1].append(limitation)
+            applied = [limitation for _, group in effective.values() for limitation in group]
+            if not applied:
+                self.rules.append(None)
+                continue
+            self.rules.append(LimitationRules(
+                min((x.views for x in applied if x.views), default=0),
+                [(x.views_difference, x.views_difference_interval) for x in applied if x.views_difference],
+            ))
+
+    def lookup(self, date: date_t) -> LimitationRules | None:
+        i = bisect_right(self.points, date) - 1
+        return self.rules[i] if i >= 0 else None
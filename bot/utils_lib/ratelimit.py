@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from telethon import TelegramClient, errors, utils
+
+DEFAULT_RATE = (10, 20)  # requests per second, burst
+RATES = {  # {'RequestClassName': (requests per second, burst)}
+    'EditAdminRequest': (1, 3),
+    'UpdateUsernameRequest': (0.2, 1),
+    'CheckUsernameRequest': (0.5, 2),
+    'SendMessageRequest': (1, 5),
+    'SendMediaRequest': (1, 5),
+    'DeleteMessagesRequest': (2, 5),
+    'GetBroadcastStatsRequest': (1, 3),
+    'GetMegagroupStatsRequest': (1, 3),
+    'LoadAsyncGraphRequest': (1, 3),
+}
+FLOOD_SLEEP_THRESHOLD = 60  # flood waits up to this many seconds are waited out and retried
+MIN_RATE_FACTOR = 0.1
+RECOVERY_FACTOR = 1.01
+
+priority_var: ContextVar[bool] = ContextVar('priority', default=False)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters: list[tuple[bool, int, asyncio.Event]] = []  # heap of (not priority, arrival, event)
+        self.arrivals = itertools.count()
+
+    async def acquire(self, priority: bool = False):
+        # only the first waiter takes tokens, priority requests are queued ahead of the regular ones
+        waiter = (not priority, next(self.arrivals), asyncio.Event())
+        heapq.heappush(self.waiters, waiter)
+        try:
+            while True:
+                if self.waiters[0] is not waiter:
+                    waiter[2].clear()
+                    await waiter[2].wait()
+                    continue
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiters.remove(waiter)
+            heapq.heapify(self.waiters)
+            if self.waiters:
+                self.waiters[0][2].set()
+
+    def block(self, seconds: int):
+        # learn from the flood wait: stop the family for the given time and slow it down
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_FACTOR)
+
+    def recover(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.rate * RECOVERY_FACTOR, self.max_rate)
+
+
+class RateLimiter:
+    def __init__(self, rates: dict[str, tuple[float, float]] = None, default: tuple[float, float] = DEFAULT_RATE):
+        self.rates = RATES if rates is None else rates
+        self.default = default
+        self.buckets: dict[str, TokenBucket] = {}
+
+    @contextmanager
+    def priority(self):
+        # requests of a priority task take the tokens of their family before the waiting regular ones
+        token = priority_var.set(True)
+        try:
+            yield
+        finally:
+            priority_var.reset(token)
+
+    async def acquire(self, request):
+        await self.bucket(request).acquire(priority_var.get())
+
+    def bucket(self, request) -> TokenBucket:
+        family = type(request).__name__
+        if family not in self.buckets:
+            self.buckets[family] = TokenBucket(*self.rates.get(family, self.default))
+        return self.buckets[family]
+
+
+class RateLimitedClient(TelegramClient):
+    def __init__(self, *args, limiter: RateLimiter = None, **kwargs):
+        super().__init__(*args, flood_sleep_threshold=0, **kwargs)
+        self.limiter = limiter or RateLimiter()
+
+    async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        requests = list(request) if utils.is_list_like(request) else [request]
+        while True:
+            for r in requests:
+                await self.limiter.acquire(r)
+            try:
+                result = await super()._call(sender, request, ordered, flood_sleep_threshold)
+            except errors.FloodWaitError as e:
+                failed = e.request if e.request is not None else requests[0]
+                self.limiter.bucket(failed).block(e.seconds)
+                logging.warning(f'Flood wait {e.seconds} seconds for {type(failed).__name__}')
+                if e.seconds > FLOOD_SLEEP_THRESHOLD:
+                    raise
+                continue
+            for r in requests:
+                self.limiter.bucket(r).recover()
+            return result
@@ -0,0 +1,15 @@
+def parse_lang_stats_restrictions(restrictions: str | None) -> dict[str, int]:
+    # {'English': 1000, 'Russian': -5} (minus means percentage)
+    result = {}
+    for restriction in (restrictions or '').split('\n'):
+        split = restriction.split()
+        if len(split) != 2:
+            continue
+        lang, value = split
+        if value[-1] == '%':
+            value = '-' + value[:-1]
+        try:
+            result[lang.capitalize()] = int(value)
+        except ValueError:
+            continue
+    return result
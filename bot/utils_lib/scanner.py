@@ -0,0 +1,86 @@
+from datetime import date as date_t, datetime, timezone
+from telethon import TelegramClient, types, hints
+from telethon.tl.functions.messages import GetMessagesViewsRequest
+
+VIEWS_CHUNK_SIZE = 100
+ALBUM_MAX_SIZE = 10
+
+
+class Post:
+    __slots__ = ('id', 'date', 'grouped_id', 'views')
+
+    def __init__(self, message_id: int, date: datetime, grouped_id: int | None, views: int):
+        self.id = message_id
+        self.date = date
+        self.grouped_id = grouped_id
+        self.views = views
+
+
+class ChannelCursor:
+    def __init__(self):
+        self.max_id = 0  # newest post id recorded in the cursor
+        self.min_date: date_t | None = None  # oldest day covered by the cursor
+        self.posts: dict[int, Post] = {}
+        self.boundaries: dict[date_t, int] = {}  # {'2021-01-21': 1234} lowest message id of the day
+        self.groups: dict[int, set[int]] = {}  # {grouped_id: {message_id, ...}} albums seen by the scan
+        self.incomplete_groups: set[int] = set()  # albums partly cut off by the scan window
+
+    @property
+    def empty(self):
+        return self.min_date is None
+
+    def covers(self, min_date: date_t):
+        return not self.empty and self.min_date <= min_date
+
+    def add(self, message: types.Message):
+        if message.grouped_id:
+            self.groups.setdefault(message.grouped_id, set()).add(message.id)
+        if not message.views:
+            # not recorded, so the next scan has to fetch it again
+            return
+        self.max_id = max(self.max_id, message.id)
+        date = message.date.replace(tzinfo=timezone.utc)
+        self.posts[message.id] = Post(message.id, date, message.grouped_id, message.views)
+        day = date.date()
+        if day not in self.boundaries or message.id < self.boundaries[day]:
+            self.boundaries[day] = message.id
+
+    def remove(self, message_id: int):
+        post = self.posts.pop(message_id, None)
+        if post and post.grouped_id in self.groups:
+            group = self.groups[post.grouped_id]
+            group.discard(message_id)
+            if not group:
+                del self.groups[post.grouped_id]
+                self.incomplete_groups.discard(post.grouped_id)
+
+    def boundary(self, min_date: date_t):
+        return min((message_id for day, message_id in self.boundaries.items() if day >= min_date), default=self.max_id + 1)
+
+    def trim(self, min_date: date_t):
+        low = self.boundary(min_date)
+        self.posts = {message_id: post for message_id, post in self.posts.items() if message_id >= low}
+        self.boundaries = {day: message_id for day, message_id in self.boundaries.items() if day >= min_date}
+        groups = {}
+        for grouped_id, message_ids in self.groups.items():
+            kept = {x for x in message_ids if x >= low}
+            if kept:
+                groups[grouped_id] = kept
+                if len(kept) < len(message_ids):
+                    self.incomplete_groups.add(grouped_id)
+        self.groups = groups
+        self.incomplete_groups &= groups.keys()
+        self.min_date = min_date
+
+
+async def refresh_views(client: 'TelegramClient', entity: 'hints.EntityLike', cursor: ChannelCursor):
+    entity = await client.get_input_entity(entity)
+    ids = list(cursor.posts)
+    for offset in range(0, len(ids), VIEWS_CHUNK_SIZE):
+        chunk = ids[offset:offset + VIEWS_CHUNK_SIZE]
+        result: types.messages.MessageViews = await client(GetMessagesViewsRequest(entity, chunk, increment=False))
+        for message_id, views in zip(chunk, result.views):
+            if views.views:
+                cursor.posts[message_id].views = views.views
+            else:  # deleted post
+                cursor.remove(message_id)
@@ -1,3 +1,4 @@
+import asyncio
 import typing
 from telethon import TelegramClient, types, hints, helpers, functions, errors
 from telethon.tl.functions.stats import LoadAsyncGraphRequest
@@ -14,31 +15,56 @@ async def _get_graphs(request, sndr, graph_request_types):
     return result, graphs
 
 
+# keeps one exported sender per DC and remembers the stats DC of each channel
 # noinspection PyProtectedMember,PyTypeChecker
-async def get_stats_with_graphs(
-        client: 'TelegramClient',
-        entity: 'hints.EntityLike',
-        graph_request_types: typing.Sequence[str],
-):
-    entity = await client.get_input_entity(entity)
-    if helpers._entity_type(entity) != helpers._EntityType.CHANNEL:
-        raise TypeError('You must pass a channel entity')
-
-    req = None
-    try:
-        req = functions.stats.GetBroadcastStatsRequest(entity)
-        return await _get_graphs(req, client, graph_request_types)
-    except errors.StatsMigrateError as e:
-        dc = e.dc
-    except errors.BroadcastRequiredError:
-        req = functions.stats.GetMegagroupStatsRequest(entity)
+class StatsClient:
+    def __init__(self, client: 'TelegramClient'):
+        self.client = client
+        self.senders = {}  # {dc_id: MTProtoSender}
+        self.channel_dcs: dict[int, int] = {}  # {channel_id: dc_id}
+        self.megagroups: set[int] = set()
+        self.lock = asyncio.Lock()
+
+    async def get_sender(self, dc: int):
+        async with self.lock:
+            sender = self.senders.get(dc)
+            if sender is None or not sender.is_connected():
+                # borrowed senders are never returned, so the client keeps them connected
+                sender = self.senders[dc] = await self.client._borrow_exported_sender(dc)
+            return sender
+
+    async def send(self, sender, request):
+        limiter = getattr(self.client, 'limiter', None)
+        if limiter:
+            await limiter.acquire(request)
         try:
-            return await _get_graphs(req, client, graph_request_types)
-        except errors.StatsMigrateError as e:
-            dc = e.dc
-
-    sender = await client._borrow_exported_sender(dc)
-    try:
-        return await _get_graphs(req, sender.send, graph_request_types)
-    finally:
-        await client._return_exported_sender(sender)
+            return await sender.send(request)
+        except errors.FloodWaitError as e:
+            if limiter:
+                limiter.bucket(request).block(e.seconds)
+            raise
+
+    async def get_stats_with_graphs(self, entity: 'hints.EntityLike', graph_request_types: typing.Sequence[str]):
+        entity = await self.client.get_input_entity(entity)
+        if helpers._entity_type(entity) != helpers._EntityType.CHANNEL:
+            raise TypeError('You must pass a channel entity')
+        channel_id = entity.channel_id
+
+        while True:
+            if channel_id in self.megagroups:
+                req = functions.stats.GetMegagroupStatsRequest(entity)
+            else:
+                req = functions.stats.GetBroadcastStatsRequest(entity)
+            try:
+                dc = self.channel_dcs.get(channel_id)
+                if dc is None:
+                    return await _get_graphs(req, self.client, graph_request_types)
+                sender = await self.get_sender(dc)
+                return await _get_graphs(req, lambda x: self.send(sender, x), graph_request_types)
+            except errors.StatsMigrateError as e:
+                self.channel_dcs[channel_id] = e.dc
+            except errors.BroadcastRequiredError:
+                if channel_id in self.megagroups:
+                    raise
+                self.megagroups.add(channel_id)
+
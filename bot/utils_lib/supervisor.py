@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Coroutine, Any
+from telethon import TelegramClient, errors
+
+BACKOFF_BASE = 5
+BACKOFF_MAX = 600
+REPORT_INTERVAL = 600
+
+
+class JobStats:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.last_error: str | None = None
+        self.last_run: float | None = None
+
+    def __str__(self):
+        avg = self.total_duration / self.runs if self.runs else 0
+        return (f'runs {self.runs}, failures {self.failures}, last {self.last_duration:.1f}s, avg {avg:.1f}s, '
+                f'last error {self.last_error or "-"}')
+
+
+class Supervisor:
+    def __init__(self, client: TelegramClient, backoff_base: int = BACKOFF_BASE, backoff_max: int = BACKOFF_MAX):
+        self.client = client
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats: dict[str, JobStats] = {}
+
+    async def run(self, jobs: list[tuple[str, Callable[[], Coroutine[Any, Any, Any]], int]]):
+        tasks = []
+        for name, func, interval in jobs:
+            self.stats[name] = JobStats()
+            tasks.append(asyncio.create_task(self.supervise(name, func, interval), name=name))
+        tasks.append(asyncio.create_task(self.report()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def ensure_connected(self):
+        if not self.client.is_connected():
+            logging.warning('Client is disconnected, reconnecting')
+            await self.client.connect()
+
+    async def supervise(self, name: str, func: Callable[[], Coroutine[Any, Any, Any]], interval: int):
+        stats = self.stats[name]
+        while True:
+            started = time.monotonic()
+            try:
+                await self.ensure_connected()
+                await func()
+                stats.consecutive_failures = 0
+            except errors.UnauthorizedError:
+                raise
+            except errors.FloodWaitError as e:
+                # the flooded request family is already blocked by the client rate limiter
+                logging.warning(f'Job {name}: flood wait {e.seconds} seconds')
+                stats.last_error = repr(e)
+            except Exception as e:
+                stats.failures += 1
+                stats.consecutive_failures += 1
+                stats.last_error = repr(e)[-256:]
+                delay = min(self.backoff_base * 2 ** (stats.consecutive_failures - 1), self.backoff_max)
+                logging.exception(f'Job {name} failed ({stats.consecutive_failures} in a row), restarting in {delay} seconds')
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                stats.runs += 1
+                stats.last_duration = time.monotonic() - started
+                stats.total_duration += stats.last_duration
+                stats.last_run = time.time()
+            await asyncio.sleep(random.randint(interval, interval + 16))
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            for name, stats in self.stats.items():
+                logging.info(f'Job {name}: {stats}')